@@ -26,7 +26,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=True,
-    upx=True,
+    # UPX-packed Qt DLLs are decompressed on every launch; see build_windows.bat.
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -0,0 +1,86 @@
+"""Compare the legacy in-memory XLSX builder with the write-only exporter.
+
+Each (mode, rows) pair runs in a fresh subprocess so ``ru_maxrss`` reflects
+that export only. One row is written per teacher, three students each.
+
+Usage: python benchmarks/bench_export.py [--rows 1000,100000,1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def _legacy_export(output_path: Path, groups, seed: int) -> None:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Groups"
+    ws.append(["Teacher", "Students"])
+    for teacher, students in groups.items():
+        ws.append([teacher, ", ".join(students)])
+    ws2 = wb.create_sheet("Summary")
+    ws2.append(["Seed", seed])
+    ws2.append(["Teachers", len(groups)])
+    ws2.append(["Assigned Students", sum(len(v) for v in groups.values())])
+    wb.save(str(output_path))
+
+
+def _run_mode(mode: str, rows: int, out: str) -> dict:
+    # Load both writers up front so import time and memory stay out of the numbers.
+    importlib.import_module("openpyxl")
+    importlib.import_module("grouper.export")
+
+    groups = {f"老师{i}": [f"学生{3 * i}", f"学生{3 * i + 1}", f"学生{3 * i + 2}"] for i in range(rows)}
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        _legacy_export(Path(out), groups, 42)
+    else:
+        from grouper.export import write_xlsx
+
+        write_xlsx(Path(out), groups, 42)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"mode": mode, "rows": rows, "seconds": elapsed, "export_rss_kb": peak - base_rss}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="1000,100000,1000000")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, int(args.rows), args.out)))
+        return
+
+    print(f"{'mode':<8} {'rows':>9} {'seconds':>9} {'extra RSS MB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(r) for r in args.rows.split(",")):
+            for mode in ("legacy", "stream"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--mode", mode, "--rows", str(rows), "--out", str(Path(tmp) / f"{mode}.xlsx")],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                )
+                r = json.loads(out.stdout)
+                print(f"{r['mode']:<8} {r['rows']:>9} {r['seconds']:>9.2f} {r['export_rss_kb'] / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
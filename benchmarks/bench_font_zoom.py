@@ -0,0 +1,142 @@
+"""Per-zoom latency of the desktop window with a large roster loaded.
+
+The real ``grouper.app`` window is started offscreen with ``QApplication.exec``
+replaced by the measurement, ``--lines`` student names are loaded, and the
+font is stepped up and down ``--steps`` times. Each step is timed from the
+zoom call until the event queue has been drained for ``--settle`` seconds,
+counting only time spent processing events, so background relayout that Qt
+spreads over later event-loop turns is included.
+
+``legacy`` reproduces the previous behaviour for comparison: the students
+editor is swapped for a rich-text ``QTextEdit`` and every widget gets its own
+``setFont`` on each step. Each mode runs in a fresh subprocess.
+
+Usage: python benchmarks/bench_font_zoom.py [--lines 100000] [--steps 10] [--modes current,legacy]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def _pump(app, seconds: float) -> float:
+    """Process events for ``seconds``; return the time spent inside processEvents."""
+    busy = 0.0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        app.processEvents()
+        busy += time.perf_counter() - start
+        time.sleep(0.002)
+    return busy
+
+
+def _measure(app, win, args) -> dict:
+    from PySide6.QtWidgets import QTextEdit, QWidget
+
+    _pump(app, 1.0)  # let deferred start-up work finish
+    text = "\n".join(f"学生{i}" for i in range(args.lines))
+    editor = win.students_edit
+    if args.mode == "legacy":
+        legacy = QTextEdit()
+        editor.parentWidget().layout().replaceWidget(editor, legacy)
+        editor.hide()
+        legacy.setText(text)
+
+        def zoom(size: int) -> None:
+            font = app.font()
+            font.setPointSize(size)
+            app.setFont(font)
+            win.setFont(font)
+            for widget in win.findChildren(QWidget):
+                widget.setFont(font)
+
+    else:
+        editor.setPlainText(text)
+
+        def zoom(size: int) -> None:
+            win._apply_font_size(size)
+
+    _pump(app, 2.0)
+    base = win._current_font_size
+    latencies = []
+    for i in range(args.steps):
+        size = base + 1 if i % 2 == 0 else base
+        start = time.perf_counter()
+        zoom(size)
+        busy = time.perf_counter() - start
+        latencies.append(busy + _pump(app, args.settle))
+    return {
+        "mode": args.mode,
+        "lines": args.lines,
+        "median_ms": statistics.median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def _run_mode(args) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication, QMainWindow
+
+    result = {}
+
+    def fake_exec(app) -> int:
+        win = next(w for w in QApplication.topLevelWidgets() if isinstance(w, QMainWindow))
+        result.update(_measure(app, win, args))
+        return 0
+
+    QApplication.exec = fake_exec
+    from grouper.app import main as app_main
+
+    sys.argv = [sys.argv[0]]
+    try:
+        app_main()
+    except SystemExit:
+        pass
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--settle", type=float, default=1.5)
+    parser.add_argument("--modes", default="current,legacy")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args)))
+        return
+
+    print(f"{'mode':>8} {'lines':>8} {'median ms':>10} {'max ms':>10}")
+    for mode in args.modes.split(","):
+        cmd = [
+            sys.executable,
+            __file__,
+            "--mode",
+            mode,
+            "--lines",
+            str(args.lines),
+            "--steps",
+            str(args.steps),
+            "--settle",
+            str(args.settle),
+        ]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{r['mode']:>8} {r['lines']:>8} {r['median_ms']:>10.1f} {r['max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
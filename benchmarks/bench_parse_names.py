@@ -0,0 +1,101 @@
+"""Compare the legacy ``parse_names_block`` with the streaming ``iter_names``.
+
+Each mode runs in a fresh subprocess so ``ru_maxrss`` reflects that mode only.
+
+Usage: python benchmarks/bench_parse_names.py [--lines 2000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def _legacy_parse_names_block(text: str):
+    if not text:
+        return []
+    for s in [",", "，", ";", "；", "\t"]:
+        text = text.replace(s, "\n")
+    names = []
+    seen = set()
+    for raw in text.splitlines():
+        name = raw.split("#", 1)[0].strip()
+        if not name:
+            continue
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def _write_roster(path: Path, lines: int) -> None:
+    with path.open("w", encoding="utf-8") as fh:
+        for i in range(lines):
+            sep = "\n" if i % 7 else "，"
+            fh.write(f"学生{i}  # 备注{i % 13}{sep}")
+
+
+def _run_mode(mode: str, path: str) -> dict:
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        with open(path, encoding="utf-8") as fh:
+            count = len(_legacy_parse_names_block(fh.read()))
+    elif mode == "block":
+        from grouper.logic import parse_names_block
+
+        with open(path, encoding="utf-8") as fh:
+            count = len(parse_names_block(fh.read()))
+    else:
+        from grouper.logic import iter_names
+
+        with open(path, encoding="utf-8") as fh:
+            count = sum(1 for _ in iter_names(fh))
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"mode": mode, "names": count, "seconds": elapsed, "peak_rss_kb": rss_after, "delta_kb": rss_after - rss_before}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, args.path)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "roster.txt"
+        _write_roster(path, args.lines)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"roster: {args.lines} names, {size_mb:.1f} MB")
+        print(f"{'mode':<8} {'names':>10} {'seconds':>9} {'MB/s':>8} {'peak RSS MB':>12}")
+        for mode in ("legacy", "block", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--path", str(path)],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            r = json.loads(out.stdout)
+            print(
+                f"{r['mode']:<8} {r['names']:>10} {r['seconds']:>9.2f} "
+                f"{size_mb / r['seconds']:>8.1f} {r['peak_rss_kb'] / 1024:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Load-test the ``/`` POST path of ``grouper-web`` at several worker counts.
+
+For each worker count a fresh server (``python -m grouper.web_app``) is
+started on a free port, and ``--clients`` client processes each send POSTs
+back to back over a keep-alive connection for ``--duration`` seconds.
+Reports requests/second and p50/p99 latency.
+
+Usage: python benchmarks/bench_web_load.py [--workers 1,4,16] [--server gunicorn]
+       [--clients 32] [--duration 10] [--students 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not become healthy")
+
+
+def _client(args) -> list:
+    port, body, duration = args
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    latencies = []
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/", body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except OSError:
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies
+
+
+def _percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _run(workers: int, args, body: bytes) -> dict:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update(
+        {
+            "PYTHONPATH": str(ROOT / "src") + os.pathsep + env.get("PYTHONPATH", ""),
+            "GROUPER_WEB_HOST": "127.0.0.1",
+            "GROUPER_WEB_PORT": str(port),
+            "GROUPER_WEB_SERVER": args.server,
+            "GROUPER_WEB_WORKERS": str(workers),
+            "GROUPER_WEB_THREADS": str(args.threads),
+            "GROUPER_EXPORT_DIR": tempfile.mkdtemp(prefix="grouper-bench-"),
+        }
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "grouper.web_app"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_healthy(port)
+        with multiprocessing.Pool(args.clients) as pool:
+            start = time.perf_counter()
+            results = pool.map(_client, [(port, body, args.duration)] * args.clients)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latencies = sorted(lat for chunk in results for lat in chunk)
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--server", default="gunicorn", choices=["gunicorn", "waitress", "dev"])
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+
+    teachers = "\n".join(f"老师{i}:5" for i in range(args.students // 5))
+    students = "\n".join(f"学生{i}" for i in range(args.students))
+    body = urllib.parse.urlencode({"teachers": teachers, "students": students, "per_teacher": "5"}).encode()
+
+    print(f"{'workers':>7} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        r = _run(workers, args, body)
+        print(f"{r['workers']:>7} {r['requests']:>9} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
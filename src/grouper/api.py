@@ -0,0 +1,388 @@
+"""JSON API for programmatic grouping.
+
+``POST /api/v1/group`` takes one job and ``POST /api/v1/group/batch`` takes
+``{"jobs": [...]}``. A job looks like::
+
+    {"teachers": "老师1:3\\n老师2", "students": ["学生1", "学生2"],
+     "per_teacher": 2, "seed": 42, "format": "csv", "layout": "long"}
+
+``teachers``/``students`` are roster text or arrays of lines, parsed exactly
+like the form. ``seed`` is optional (a timestamp seed is used otherwise) and
+so are ``format``/``layout``; with a format, the result carries a
+``download`` URL served from the result store.
+
+``POST /api/v1/jobs`` queues the same job in the background instead (see
+:mod:`grouper.jobs`) and answers ``202`` with the job id, or ``429`` when
+the queue is full; ``GET /api/v1/jobs/<id>`` reports status and per-stage
+timings, and ``/result`` / ``/download`` stream the finished output.
+
+Request bodies may be sent with ``Content-Encoding: gzip`` or ``br``, and
+responses are compressed according to ``Accept-Encoding``. Batch jobs run in
+a process pool of ``GROUPER_API_BATCH_WORKERS`` processes.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import gzip
+import json
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import Blueprint, Response, current_app, request, send_file, url_for
+
+from grouper.cache import digest_text
+from grouper.export import LAYOUTS, export_bytes, get_exporter
+from grouper.logic import (
+    check_roster,
+    compute_seed_from_timestamp,
+    group_students,
+    parse_names_block,
+    parse_teachers_with_counts,
+)
+from grouper.jobs import DONE, FAILED, Job, QueueFull
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Responses smaller than this are sent uncompressed.
+_COMPRESS_MIN_BYTES = 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    def __init__(self, message: str, status: int = 400, headers: Optional[Dict[str, str]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _brotli():
+    try:
+        import brotli
+    except Exception:
+        return None
+    return brotli
+
+
+# -- request / response bodies ----------------------------------------------
+
+
+def _decompress(raw: bytes, encoding: str, limit: int) -> bytes:
+    if encoding in ("", "identity"):
+        data = raw
+    elif encoding in ("gzip", "x-gzip"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            data = decoder.decompress(raw, limit + 1)
+        except zlib.error as exc:
+            raise ApiError(f"gzip 请求体无效：{exc}") from exc
+    elif encoding == "br":
+        brotli = _brotli()
+        if brotli is None:
+            raise ApiError("服务器未安装 brotli，无法解压 br 请求体。", 415)
+        decoder = brotli.Decompressor()
+        try:
+            data = decoder.process(raw, output_buffer_limit=limit + 1)
+        except TypeError as exc:
+            # brotli < 1.2 cannot cap the output, so it would inflate a bomb in full.
+            raise ApiError("服务器的 brotli 版本过低（需要 1.2 及以上），无法解压 br 请求体。", 415) from exc
+        except brotli.error as exc:
+            raise ApiError(f"br 请求体无效：{exc}") from exc
+    else:
+        raise ApiError(f"不支持的 Content-Encoding：{encoding}", 415)
+    if len(data) > limit:
+        raise ApiError("请求体过大。", 413)
+    return data
+
+
+def _read_json() -> Dict[str, Any]:
+    limit = current_app.config["GROUPER_API_MAX_BYTES"]
+    encoding = request.headers.get("Content-Encoding", "").strip().lower()
+    data = _decompress(request.get_data(cache=False), encoding, limit)
+    try:
+        payload = json.loads(data)
+    except ValueError as exc:
+        raise ApiError("请求体不是有效的 JSON。") from exc
+    if not isinstance(payload, dict):
+        raise ApiError("请求体必须是 JSON 对象。")
+    return payload
+
+
+def _accepted_encodings() -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    return accepted
+
+
+def _json_response(payload: Any, status: int = 200) -> Response:
+    # Built by hand: jsonify would sort keys and lose the teacher order.
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= _COMPRESS_MIN_BYTES:
+        accepted = _accepted_encodings()
+        brotli = _brotli()
+        if brotli is not None and accepted.get("br", 0) > 0:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif accepted.get("gzip", 0) > 0:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(body, status=status, mimetype="application/json", headers=headers)
+
+
+@api.errorhandler(ApiError)
+def _api_error(exc: ApiError):
+    response = _json_response({"error": str(exc)}, exc.status)
+    response.headers.update(exc.headers)
+    return response
+
+
+# -- jobs ------------------------------------------------------------------------
+
+
+def _roster_text(value: Any, field: str) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return "\n".join(value)
+    raise ApiError(f"{field} 必须是字符串或字符串数组。")
+
+
+def _job_spec(raw: Any, default_seed: int) -> Dict[str, Any]:
+    """Validate one job from the request into the dict :func:`run_job` takes."""
+    if not isinstance(raw, dict):
+        raise ApiError("每个任务必须是 JSON 对象。")
+    per_teacher = raw.get("per_teacher", 1)
+    if isinstance(per_teacher, bool) or not isinstance(per_teacher, int) or per_teacher < 0:
+        raise ApiError("per_teacher 必须是非负整数。")
+    seed = raw.get("seed")
+    if seed is None:
+        seed = default_seed
+    elif isinstance(seed, bool) or not isinstance(seed, int):
+        raise ApiError("seed 必须是整数。")
+    fmt = raw.get("format")
+    if fmt is not None:
+        try:
+            fmt = get_exporter(str(fmt)).key
+        except (ValueError, RuntimeError) as exc:
+            raise ApiError(str(exc)) from exc
+    layout = raw.get("layout", "wide")
+    if layout not in LAYOUTS:
+        raise ApiError("未知的导出布局。")
+    return {
+        "teachers": _roster_text(raw.get("teachers"), "teachers"),
+        "students": _roster_text(raw.get("students"), "students"),
+        "per_teacher": per_teacher,
+        "seed": seed,
+        "format": fmt,
+        "layout": layout,
+    }
+
+
+def _parse(teachers_text: str, students_text: str):
+    teachers, counts = parse_teachers_with_counts(teachers_text)
+    return teachers, counts, parse_names_block(students_text)
+
+
+def group_job(
+    spec: Dict[str, Any], parsed=None, timings: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """Parse and group one validated job, without exporting.
+
+    Raises ``ValueError`` with a user-facing message for unusable rosters,
+    using the same checks as the web form. Stage durations in seconds are
+    recorded in ``timings`` when given.
+    """
+    start = time.perf_counter()
+    teachers, counts, students = parsed or _parse(spec["teachers"], spec["students"])
+    parsed_at = time.perf_counter()
+    per_teacher = spec["per_teacher"]
+    check_roster(teachers, students, per_teacher, counts)
+
+    seed = spec["seed"]
+    groups = group_students(students, teachers, per_teacher, seed, counts)
+    assigned_set = {name for members in groups.values() for name in members}
+    result = {
+        "seed": seed,
+        "teacher_count": len(teachers),
+        "student_count": len(students),
+        "assigned_students": sum(len(members) for members in groups.values()),
+        "groups": groups,
+        "unassigned": [s for s in students if s not in assigned_set],
+    }
+    if timings is not None:
+        timings["parse"] = parsed_at - start
+        timings["group"] = time.perf_counter() - parsed_at
+    return result
+
+
+def run_job(spec: Dict[str, Any], parsed=None) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """Group one validated job and render its export; returns ``(result, export_data)``."""
+    result = group_job(spec, parsed)
+    data = export_bytes(result["groups"], result["seed"], spec["format"], spec["layout"]) if spec["format"] else None
+    return result, data
+
+
+def _run_job_safely(spec: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    try:
+        return run_job(spec)
+    except ValueError as exc:
+        return {"error": str(exc)}, None
+
+
+def _attach_download(result: Dict[str, Any], spec: Dict[str, Any], data: Optional[bytes]) -> Dict[str, Any]:
+    if data is None:
+        return result
+    exporter = get_exporter(spec["format"])
+    timestamp = _dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"Grouper_{timestamp}_{result['seed']}{exporter.extension}"
+    token = current_app.extensions["grouper_results"].put(data, filename, exporter.mimetype)
+    result["download"] = url_for("download_result", token=token) if token else None
+    return result
+
+
+def _batch_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# -- routes ----------------------------------------------------------------------
+
+
+@api.route("/group", methods=["POST"])
+def group():
+    spec = _job_spec(_read_json(), compute_seed_from_timestamp())
+    parse_cache = current_app.extensions["grouper_caches"]["parse"]
+    parsed = parse_cache.get_or_compute(
+        digest_text(spec["teachers"], spec["students"]),
+        lambda: _parse(spec["teachers"], spec["students"]),
+    )
+    try:
+        result, data = run_job(spec, parsed)
+    except ValueError as exc:
+        raise ApiError(str(exc), 422) from exc
+    return _json_response(_attach_download(result, spec, data))
+
+
+@api.route("/group/batch", methods=["POST"])
+def group_batch():
+    jobs = _read_json().get("jobs")
+    if not isinstance(jobs, list) or not jobs:
+        raise ApiError("jobs 必须是非空数组。")
+    max_jobs = current_app.config["GROUPER_API_MAX_BATCH"]
+    if len(jobs) > max_jobs:
+        raise ApiError(f"单次最多提交 {max_jobs} 个任务。", 413)
+    # Jobs without a seed get distinct ones, so identical rosters differ.
+    base_seed = compute_seed_from_timestamp()
+    specs = [_job_spec(raw, base_seed + i) for i, raw in enumerate(jobs)]
+
+    workers = current_app.config["GROUPER_API_BATCH_WORKERS"]
+    if workers > 1 and len(specs) > 1:
+        outputs = list(_batch_pool(workers).map(_run_job_safely, specs))
+    else:
+        outputs = [_run_job_safely(spec) for spec in specs]
+    results: List[Dict[str, Any]] = [
+        _attach_download(result, spec, data) for spec, (result, data) in zip(specs, outputs)
+    ]
+    return _json_response({"results": results})
+
+
+def submit_job(spec: Dict[str, Any]) -> str:
+    """Queue ``spec``; raises :class:`ApiError` 429 when the queue is full."""
+    queue = current_app.extensions["grouper_jobs"]
+    try:
+        return queue.submit(spec)
+    except QueueFull as exc:
+        raise ApiError("任务队列已满，请稍后再试。", 429, {"Retry-After": "30"}) from exc
+
+
+def _job_or_404(job_id: str) -> Job:
+    job = current_app.extensions["grouper_jobs"].get(job_id)
+    if job is None:
+        raise ApiError("任务不存在或已过期。", 404)
+    return job
+
+
+def _job_payload(job: Job) -> Dict[str, Any]:
+    payload = job.as_dict()
+    payload["status_url"] = url_for("api.job_status", job_id=job.id)
+    if job.status == DONE:
+        payload["result_url"] = url_for("api.job_result", job_id=job.id)
+        if job.filename:
+            payload["download_url"] = url_for("api.job_download", job_id=job.id)
+    return payload
+
+
+@api.route("/jobs", methods=["POST"])
+def create_job():
+    spec = _job_spec(_read_json(), compute_seed_from_timestamp())
+    job = _job_or_404(submit_job(spec))
+    response = _json_response(_job_payload(job), 202)
+    response.headers["Location"] = url_for("api.job_status", job_id=job.id)
+    return response
+
+
+@api.route("/jobs/<job_id>")
+def job_status(job_id: str):
+    return _json_response(_job_payload(_job_or_404(job_id)))
+
+
+def _finished_job(job_id: str) -> Job:
+    job = _job_or_404(job_id)
+    if job.status == FAILED:
+        raise ApiError(job.error or "任务失败。", 422)
+    if job.status != DONE:
+        raise ApiError("任务尚未完成。", 409, {"Retry-After": "2"})
+    return job
+
+
+@api.route("/jobs/<job_id>/result")
+def job_result(job_id: str):
+    job = _finished_job(job_id)
+    path = current_app.extensions["grouper_jobs"].result_path(job)
+    try:
+        stream = open(path, "rb")
+    except FileNotFoundError as exc:
+        raise ApiError("任务结果已被清理。", 410) from exc
+    return send_file(stream, mimetype="application/json", max_age=0)
+
+
+@api.route("/jobs/<job_id>/download")
+def job_download(job_id: str):
+    job = _finished_job(job_id)
+    path = current_app.extensions["grouper_jobs"].export_path(job)
+    if path is None:
+        raise ApiError("该任务未指定导出格式。", 404)
+    try:
+        stream = open(path, "rb")
+    except FileNotFoundError as exc:
+        raise ApiError("任务结果已被清理。", 410) from exc
+    return send_file(stream, mimetype=job.mimetype, as_attachment=True, download_name=job.filename, max_age=0)
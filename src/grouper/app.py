@@ -1,20 +1,31 @@
 from __future__ import annotations
 
+import time
+
+# Start of the --profile-startup clock: covers this module's own imports.
+_IMPORT_START = time.perf_counter()
+
 import datetime as _dt
 import os
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List
 
-from grouper.config import Settings, ensure_runtime_dirs, ASSETS_DIR, APP_VERSION
+from grouper.config import CACHE_DIR, Settings, ensure_runtime_dirs, ASSETS_DIR, APP_VERSION
+from grouper.export import LAYOUT_LABELS, LAYOUTS, available_exporters, export_groups, get_exporter
 from grouper.logic import (
     compute_seed_from_timestamp,
     group_students,
-    parse_names_block,
-    parse_teachers_with_counts,
     determine_desired_counts,
 )
+from grouper.roster import RosterLines, RosterSummary, summarize
+from grouper.startup import PROFILE_FLAG, StartupProfile, prune_splash_cache, splash_cache_path
 from grouper.styling import load_styles
+from grouper.upload import iter_roster_file
+
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 
 def _try_open_directory(path: str) -> None:
@@ -27,28 +38,15 @@ def _try_open_directory(path: str) -> None:
         os.system(f'xdg-open "{p}"')
 
 
-def _export_xlsx(output_path: Path, groups: Dict[str, List[str]], seed: int) -> None:
-    try:
-        from openpyxl import Workbook
-    except Exception as e:  # pragma: no cover - runtime dependency
-        raise RuntimeError("缺少 openpyxl，请先安装：pip install openpyxl") from e
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Groups"
-    ws.append(["Teacher", "Students"])
-    for teacher, students in groups.items():
-        ws.append([teacher, ", ".join(students)])
-
-    ws2 = wb.create_sheet("Summary")
-    total_students = sum(len(v) for v in groups.values())
-    ws2.append(["Seed", seed])
-    ws2.append(["Teachers", len(groups)])
-    ws2.append(["Assigned Students", total_students])
-    wb.save(str(output_path))
+def _export(output_path: Path, groups: Dict[str, List[str]], seed: int, fmt: str = "xlsx", layout: str = "wide") -> None:
+    export_groups(output_path, groups, seed, fmt, layout)
 
 
 def main() -> None:
+    profile = StartupProfile(enabled=PROFILE_FLAG in sys.argv[1:], origin=_IMPORT_START)
+    profile.add("导入 grouper 模块", _IMPORT_SECONDS)
+    argv = [arg for arg in sys.argv if arg != PROFILE_FLAG]
+
     # In some Linux headless environments (no X11/Wayland), Qt cannot
     # initialize the default xcb/wayland platform plugin and aborts.
     # Detect that situation early and default to an offscreen platform
@@ -63,37 +61,40 @@ def main() -> None:
         pass
 
     # Lazy import Qt to avoid import costs during tooling
-    from PySide6.QtCore import Qt, QSize, QUrl
-    from PySide6.QtGui import (
-        QPixmap,
-        QFont,
-        QFontDatabase,
-        QIcon,
-        QPalette,
-        QBrush,
-        QDesktopServices,
-        QPainter,
-    )
-    from PySide6.QtWidgets import (
-        QApplication,
-        QFileDialog,
-        QHBoxLayout,
-        QLabel,
-        QLineEdit,
-        QMainWindow,
-        QMessageBox,
-        QPushButton,
-        QSpinBox,
-        QSplashScreen,
-        QTextEdit,
-        QVBoxLayout,
-        QWidget,
-        QFrame,
-    )
-
-    ensure_runtime_dirs()
-
-    settings = Settings.load()
+    with profile.phase("导入 PySide6"):
+        from PySide6.QtCore import Qt, QEvent, QObject, QRunnable, QSize, QThreadPool, QTimer, QUrl, Signal
+        from PySide6.QtGui import (
+            QImage,
+            QPixmap,
+            QFont,
+            QFontDatabase,
+            QIcon,
+            QDesktopServices,
+            QPainter,
+            QTextCursor,
+        )
+        from PySide6.QtWidgets import (
+            QApplication,
+            QComboBox,
+            QFileDialog,
+            QHBoxLayout,
+            QLabel,
+            QLineEdit,
+            QMainWindow,
+            QMessageBox,
+            QPlainTextEdit,
+            QProgressBar,
+            QPushButton,
+            QSpinBox,
+            QSplashScreen,
+            QVBoxLayout,
+            QWidget,
+            QFrame,
+        )
+
+    with profile.phase("读取设置"):
+        ensure_runtime_dirs()
+        settings = Settings.load()
     version_text = f"开发者：黄伟斌\n版本：{APP_VERSION}"
 
     def _coerce_welcome_font(value: int | str | None) -> int:
@@ -106,63 +107,95 @@ def main() -> None:
             size = 24
         return max(12, min(72, size))
 
-    app = QApplication(sys.argv)
-    app.setApplicationName("Grouper")
-    try:
-        app.setApplicationVersion(APP_VERSION)
-    except Exception:
-        pass
+    with profile.phase("创建 QApplication"):
+        app = QApplication(argv)
+        app.setApplicationName("Grouper")
+        try:
+            app.setApplicationVersion(APP_VERSION)
+        except Exception:
+            pass
 
-    app_icon: QIcon | None = None
-    logo_path = ASSETS_DIR / "logo.jpg"
-    if logo_path.exists():
-        icon = QIcon(str(logo_path))
-        if not icon.isNull():
-            app.setWindowIcon(icon)
-            app_icon = icon
+    def _apply_cjk_font() -> None:
+        # Prefer system fonts that have robust CJK glyph coverage to avoid garbled text.
+        # Enumerating font families is slow on Windows, so this runs after first paint.
+        try:
+            families_win = ["Microsoft YaHei", "微软雅黑", "SimHei", "SimSun", "Segoe UI"]
+            families_mac = ["PingFang SC", "Heiti SC", "Hiragino Sans GB", "Songti SC"]
+            families_lin = ["Noto Sans CJK SC", "WenQuanYi Micro Hei", "Source Han Sans CN", "DejaVu Sans"]
+            fams = families_lin
+            if sys.platform.startswith("win"):
+                fams = families_win
+            elif sys.platform == "darwin":
+                fams = families_mac
+            chosen = next((f for f in fams if QFontDatabase.hasFamily(f)), None)
+            if chosen:
+                font = app.font()
+                font.setFamily(chosen)
+                app.setFont(font)
+        except Exception:
+            pass
+
+    def _splash_pixmap(source: Path, size: QSize) -> QPixmap | None:
+        """Load the splash at ``size``, from the pre-scaled cache when possible.
+
+        A miss decodes and smooth-scales the full image once, then writes the
+        scaled copy to the cache on a worker thread.
+        """
+        cached = splash_cache_path(source, size.width(), size.height())
+        if cached is not None and cached.exists():
+            pm = QPixmap(str(cached))
+            if not pm.isNull():
+                return pm
+        image = QImage(str(source))
+        if image.isNull():
+            return None
+        image = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        if cached is not None:
+
+            def _store() -> None:
+                try:
+                    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    if image.save(str(cached), "JPG", 92):
+                        prune_splash_cache(source, cached)
+                except Exception:
+                    pass
 
-    # Prefer system fonts that have robust CJK glyph coverage to avoid garbled text
-    try:
-        families_win = ["Microsoft YaHei", "微软雅黑", "SimHei", "SimSun", "Segoe UI"]
-        families_mac = ["PingFang SC", "Heiti SC", "Hiragino Sans GB", "Songti SC"]
-        families_lin = ["Noto Sans CJK SC", "WenQuanYi Micro Hei", "Source Han Sans CN", "DejaVu Sans"]
-        fams = families_lin
-        if sys.platform.startswith("win"):
-            fams = families_win
-        elif sys.platform == "darwin":
-            fams = families_mac
-        db = QFontDatabase()
-        chosen = None
-        for f in fams:
-            if f in db.families():
-                chosen = f
-                break
-        if chosen:
-            app.setFont(QFont(chosen, 10))
-    except Exception:
-        pass
+            QThreadPool.globalInstance().start(_store)
+        return QPixmap.fromImage(image)
 
     # Splash / Welcome
     welcome_image = ASSETS_DIR / "welcome-picture.jpg"  # prompt's specified name
     splash: QSplashScreen | None = None
-    if welcome_image.exists():
-        pm = QPixmap(str(welcome_image))
-        if not pm.isNull():
+    with profile.phase("欢迎画面"):
+        if welcome_image.exists():
             target_size = QSize(1280, 720)
-            scaled = pm.scaled(target_size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-            splash = QSplashScreen(scaled)
-            splash.setFixedSize(target_size)
-            splash_size = _coerce_welcome_font(getattr(settings, "welcome_font_size", 24))
-            splash_font = QFont(app.font())
-            splash_font.setPointSize(splash_size)
-            splash.setFont(splash_font)
-            splash.showMessage(
-                version_text,
-                alignment=Qt.AlignBottom | Qt.AlignHCenter,
-            )
-            splash.show()
-    else:
-        QMessageBox.information(None, "欢迎", version_text)
+            scaled = _splash_pixmap(welcome_image, target_size)
+            if scaled is not None:
+                splash = QSplashScreen(scaled)
+                splash.setFixedSize(target_size)
+                splash_size = _coerce_welcome_font(getattr(settings, "welcome_font_size", 24))
+                splash_font = QFont(app.font())
+                splash_font.setPointSize(splash_size)
+                splash.setFont(splash_font)
+                splash.showMessage(
+                    version_text,
+                    alignment=Qt.AlignBottom | Qt.AlignHCenter,
+                )
+                splash.show()
+                # Paint the splash now, before the main window is built.
+                app.processEvents()
+        else:
+            QMessageBox.information(None, "欢迎", version_text)
+    profile.mark("欢迎画面已显示")
+
+    with profile.phase("加载图标"):
+        app_icon: QIcon | None = None
+        logo_path = ASSETS_DIR / "logo.jpg"
+        if logo_path.exists():
+            icon = QIcon(str(logo_path))
+            if not icon.isNull():
+                app.setWindowIcon(icon)
+                app_icon = icon
 
     TEACHERS_SAMPLE = (
         "# 这是一个示例\n"
@@ -181,6 +214,227 @@ def main() -> None:
         "学生6"
     )
 
+    class _ValidationSignals(QObject):
+        finished = Signal(int, object)
+
+    class _ValidationJob(QRunnable):
+        """Summarise roster snapshots off the GUI thread."""
+
+        def __init__(self, generation, students, teachers, per_teacher, signals, latest) -> None:
+            super().__init__()
+            self._generation = generation
+            self._students = students
+            self._teachers = teachers
+            self._per_teacher = per_teacher
+            self._signals = signals
+            self._latest = latest
+
+        def run(self) -> None:
+            summary = summarize(
+                self._students,
+                self._teachers,
+                self._per_teacher,
+                should_stop=lambda: self._latest() != self._generation,
+            )
+            if summary is not None:
+                self._signals.finished.emit(self._generation, summary)
+
+    class _ImageSignals(QObject):
+        loaded = Signal(object, float)
+
+    class _ImageLoadJob(QRunnable):
+        """Decode an image file into a QImage off the GUI thread."""
+
+        def __init__(self, path: Path, signals) -> None:
+            super().__init__()
+            self._path = path
+            self._signals = signals
+
+        def run(self) -> None:
+            start = time.perf_counter()
+            image = QImage(str(self._path))
+            self._signals.loaded.emit(None if image.isNull() else image, time.perf_counter() - start)
+
+    class _Backdrop(QObject):
+        """Paints the background image centred over the whole window.
+
+        Installed as an event filter on the window, so the image fills the
+        window itself (status bar included) behind the transparent central
+        widget. Once resizing pauses for ``SETTLE_MS`` the image is
+        smooth-scaled to fit the exact window size; the last ``MAX_CACHED``
+        such copies are kept, so maximise/restore reuses them. During a live
+        resize a fast scale of a screen-sized draft is shown instead, fitted to
+        the size rounded up to the next ``BUCKET`` pixels: it covers at least
+        what the exact fit will, the overhang is cropped, and it is only
+        rescaled when the bucket changes.
+        """
+
+        BUCKET = 32
+        SETTLE_MS = 150
+        MAX_CACHED = 8
+
+        def __init__(self, widget: QWidget) -> None:
+            super().__init__(widget)
+            self._widget = widget
+            self._source: QPixmap | None = None
+            self._draft: QPixmap | None = None
+            self._draft_target: QSize | None = None
+            self._smooth: "OrderedDict[tuple, QPixmap]" = OrderedDict()
+            self._pixmap: QPixmap | None = None
+            self._settle = QTimer(self)
+            self._settle.setSingleShot(True)
+            self._settle.setInterval(self.SETTLE_MS)
+            self._settle.timeout.connect(lambda: self._rescale(smooth=True))
+            widget.installEventFilter(self)
+
+        def set_source(self, pixmap: QPixmap) -> None:
+            self._source = pixmap
+            screen = self._widget.screen().availableGeometry().size()
+            if pixmap.width() > screen.width() or pixmap.height() > screen.height():
+                self._draft = pixmap.scaled(screen, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            else:
+                self._draft = pixmap
+            self._smooth.clear()
+            self._rescale(smooth=True)
+
+        def _rescale(self, smooth: bool) -> None:
+            size = self._widget.size()
+            if self._source is None or size.width() <= 0 or size.height() <= 0:
+                return
+            key = (size.width(), size.height())
+            pm = self._smooth.get(key)
+            if pm is not None:
+                self._smooth.move_to_end(key)
+                self._settle.stop()
+            elif smooth:
+                pm = self._source.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self._smooth[key] = pm
+                while len(self._smooth) > self.MAX_CACHED:
+                    self._smooth.popitem(last=False)
+            else:
+                self._settle.start()
+                b = self.BUCKET
+                target = QSize(-(-size.width() // b) * b, -(-size.height() // b) * b)
+                if self._pixmap is not None and target == self._draft_target:
+                    return  # same bucket as the draft already shown
+                pm = self._draft.scaled(target, Qt.KeepAspectRatio, Qt.FastTransformation)
+                self._draft_target = target
+                self._pixmap = pm
+                self._widget.update()
+                return
+            self._draft_target = None
+            self._pixmap = pm
+            self._widget.update()
+
+        def eventFilter(self, obj, event):  # type: ignore[override]
+            if obj is self._widget:
+                if event.type() == QEvent.Resize:
+                    self._rescale(smooth=False)
+                elif event.type() == QEvent.Paint and self._pixmap is not None:
+                    # The window's stylesheet background is already drawn; the
+                    # image goes on top and its overhang is clipped to the window.
+                    painter = QPainter(self._widget)
+                    x = (self._widget.width() - self._pixmap.width()) // 2
+                    y = (self._widget.height() - self._pixmap.height()) // 2
+                    painter.drawPixmap(x, y, self._pixmap)
+                    painter.end()
+            return False
+
+    class _RosterEdit(QPlainTextEdit):
+        """Plain-text roster editor that reads and loads its text without one big string.
+
+        :meth:`iter_lines` walks the document's blocks (one per line), and
+        :meth:`load_chunks` inserts text chunks in a single undo step as they
+        are produced, so a 100k-line roster never exists as a Python ``str``
+        on the way in or out.
+        """
+
+        def iter_lines(self):
+            block = self.document().firstBlock()
+            while block.isValid():
+                # Match toPlainText(): non-breaking spaces become spaces.
+                yield block.text().replace("\u00a0", " ")
+                block = block.next()
+
+        def load_chunks(self, chunks) -> None:
+            """Replace the text with ``chunks``; if reading them fails, the old text is restored."""
+            cursor = QTextCursor(self.document())
+            cursor.beginEditBlock()
+            try:
+                cursor.select(QTextCursor.Document)
+                cursor.removeSelectedText()
+                for chunk in chunks:
+                    cursor.insertText(chunk)
+            except BaseException:
+                cursor.endEditBlock()
+                self.undo()
+                raise
+            cursor.endEditBlock()
+            self.moveCursor(QTextCursor.Start)
+
+    class _GroupingSignals(QObject):
+        progress = Signal(int, str)
+        rejected = Signal(str, str)
+        failed = Signal(str)
+        cancelled = Signal()
+        finished = Signal(str)
+
+    class _GroupingJob(QRunnable):
+        """Parse, group and export on a worker thread, checking for cancel between stages."""
+
+        def __init__(self, seed, students, teachers, per_teacher, out_path, fmt, layout, signals, cancel) -> None:
+            super().__init__()
+            self._seed = seed
+            self._students = students
+            self._teachers = teachers
+            self._per_teacher = per_teacher
+            self._out = out_path
+            self._fmt = fmt
+            self._layout = layout
+            self._signals = signals
+            self._cancel = cancel
+
+        def run(self) -> None:
+            signals = self._signals
+            try:
+                students = self._students.names()
+                teachers, counts = self._teachers.teachers_with_counts()
+                if self._cancel.is_set():
+                    signals.cancelled.emit()
+                    return
+                signals.progress.emit(1, "已解析，正在分组…")
+
+                desired_counts = determine_desired_counts(teachers, self._per_teacher, counts)
+                total_needed = sum(desired_counts.values())
+                total_students = len(students)
+                if total_students != total_needed:
+                    signals.rejected.emit(
+                        "人数有误",
+                        (
+                            f"学生总数为 {total_students} 人，"
+                            f"但老师分配人数合计为 {total_needed} 人。\n"
+                            "请检查老师人数设置或学生名单后再试。"
+                        ),
+                    )
+                    return
+
+                groups = group_students(students, teachers, self._per_teacher, self._seed, counts)
+                if self._cancel.is_set():
+                    signals.cancelled.emit()
+                    return
+                signals.progress.emit(2, "已分组，正在写入…")
+
+                _export(self._out, groups, self._seed, self._fmt, self._layout)
+                if self._cancel.is_set():
+                    # The save itself cannot be interrupted; discard its output.
+                    self._out.unlink(missing_ok=True)
+                    signals.cancelled.emit()
+                    return
+                signals.progress.emit(3, "已写入")
+                signals.finished.emit(str(self._out))
+            except Exception as e:
+                signals.failed.emit(str(e))
+
     class Main(QMainWindow):
         def __init__(self, settings: Settings) -> None:
             super().__init__()
@@ -196,7 +450,8 @@ def main() -> None:
             self._current_font_size = int(initial_size)
             self._apply_font_size(self._current_font_size)
 
-            # Central frosted panel
+            # Central frosted panel; the background is painted on the window behind it
+            self._backdrop = _Backdrop(self)
             central = QWidget()
             layout = QVBoxLayout(central)
 
@@ -239,24 +494,33 @@ def main() -> None:
             panel_layout.addLayout(row1)
 
             # Teachers
-            self.teachers_edit = QTextEdit()
+            # Plain-text editors lay out only the visible blocks, so large
+            # rosters do not get a full relayout on every font change.
+            self.teachers_edit = _RosterEdit()
             self.teachers_edit.setPlaceholderText(
                 "在此粘贴老师姓名，每行一个或用逗号分隔…\n"
                 "可在老师后写数量，如：张三:3、张三（3）、张三 x3；未写则采用默认。"
             )
             teacher_text = self.settings.teachers_text or TEACHERS_SAMPLE
-            self.teachers_edit.setText(teacher_text)
-            panel_layout.addWidget(QLabel("老师名单："))
+            self.teachers_edit.setPlainText(teacher_text)
+            panel_layout.addLayout(self._roster_header("老师名单：", self.teachers_edit))
             panel_layout.addWidget(self.teachers_edit)
 
             # Students
-            self.students_edit = QTextEdit()
+            self.students_edit = _RosterEdit()
             self.students_edit.setPlaceholderText("在此粘贴学生姓名，每行一个或用逗号分隔…")
             student_text = self.settings.students_text or STUDENTS_SAMPLE
-            self.students_edit.setText(student_text)
-            panel_layout.addWidget(QLabel("学生名单："))
+            self.students_edit.setPlainText(student_text)
+            panel_layout.addLayout(self._roster_header("学生名单：", self.students_edit))
             panel_layout.addWidget(self.students_edit)
 
+            # Parsed line tables kept in sync with the editors, so grouping
+            # and validation never re-parse the whole roster.
+            self._teachers_roster = RosterLines(self.teachers_edit.iter_lines(), teachers=True)
+            self._students_roster = RosterLines(self.students_edit.iter_lines())
+            self._bind_roster(self.teachers_edit, self._teachers_roster)
+            self._bind_roster(self.students_edit, self._students_roster)
+
             # per teacher count
             row2 = QHBoxLayout()
             row2.addWidget(QLabel("每位老师分配学生数："))
@@ -267,34 +531,81 @@ def main() -> None:
             row2.addStretch(1)
             panel_layout.addLayout(row2)
 
-            # Action button
+            # Export format and layout
+            row3 = QHBoxLayout()
+            row3.addWidget(QLabel("导出格式："))
+            self.format_combo = QComboBox()
+            for exporter in available_exporters():
+                self.format_combo.addItem(exporter.label, exporter.key)
+            idx = self.format_combo.findData(self.settings.export_format)
+            self.format_combo.setCurrentIndex(max(0, idx))
+            row3.addWidget(self.format_combo)
+            row3.addWidget(QLabel("布局："))
+            self.layout_combo = QComboBox()
+            for key in LAYOUTS:
+                self.layout_combo.addItem(LAYOUT_LABELS[key], key)
+            idx = self.layout_combo.findData(self.settings.export_layout)
+            self.layout_combo.setCurrentIndex(max(0, idx))
+            row3.addWidget(self.layout_combo)
+            row3.addStretch(1)
+            panel_layout.addLayout(row3)
+
+            # Live validation preview
+            self.validation_label = QLabel("", objectName="ValidationLabel")
+            self.validation_label.setWordWrap(True)
+            panel_layout.addWidget(self.validation_label)
+
+            # Action button with progress and cancel for the background run
+            go_row = QHBoxLayout()
             self.btn_go = QPushButton("立即分组！")
-            panel_layout.addWidget(self.btn_go)
+            go_row.addWidget(self.btn_go, 1)
+            self.progress_bar = QProgressBar()
+            self.progress_bar.setRange(0, 3)
+            self.progress_bar.setTextVisible(True)
+            self.progress_bar.setVisible(False)
+            go_row.addWidget(self.progress_bar, 1)
+            self.btn_cancel = QPushButton("取消")
+            self.btn_cancel.setVisible(False)
+            go_row.addWidget(self.btn_cancel)
+            panel_layout.addLayout(go_row)
+            self._grouping_pool = QThreadPool(self)
+            self._grouping_pool.setMaxThreadCount(1)
+            self._grouping_cancel: threading.Event | None = None
+            self._grouping_signals = None
 
             layout.addStretch(1)
             layout.addWidget(panel)
             layout.addStretch(1)
             self.setCentralWidget(central)
-            self._central_widget = central
 
-            self._bg_pixmap: QPixmap | None = None
-            bg_path = ASSETS_DIR / "backgroud-picture.jpg"
-            if bg_path.exists():
-                bg_pm = QPixmap(str(bg_path))
-                if not bg_pm.isNull():
-                    self._bg_pixmap = bg_pm
-
-            # Apply stylesheet and background
-            app.setStyleSheet(load_styles())
-            self._update_background()
+            # The background is decoded after first paint; see load_background().
+            self._bg_signals = None
 
             # Signals
             btn_open.clicked.connect(self._open_dir)
             btn_browse.clicked.connect(self._browse_dir)
             self.btn_go.clicked.connect(self._run_grouping)
+            self.btn_cancel.clicked.connect(self._cancel_grouping)
             btn_zoom_in.clicked.connect(lambda: self._change_font_size(1))
             btn_zoom_out.clicked.connect(lambda: self._change_font_size(-1))
 
+            # Debounced validation: each edit restarts the timer, and only the
+            # newest generation's result is shown.
+            self._validation_generation = 0
+            self._validation_pool = QThreadPool(self)
+            self._validation_pool.setMaxThreadCount(1)
+            self._validation_signals = _ValidationSignals(self)
+            self._validation_signals.finished.connect(self._show_validation)
+            self._validation_timer = QTimer(self)
+            self._validation_timer.setSingleShot(True)
+            self._validation_timer.setInterval(250)
+            self._validation_timer.timeout.connect(self._start_validation)
+            self.teachers_edit.textChanged.connect(self._validation_timer.start)
+            self.students_edit.textChanged.connect(self._validation_timer.start)
+            self.per_spin.valueChanged.connect(lambda _value: self._validation_timer.start())
+            # First validation runs once the event loop starts, not during construction.
+            self._validation_timer.start(0)
+
             # Restore geometry
             if self.settings.geometry:
                 try:
@@ -302,43 +613,114 @@ def main() -> None:
                 except Exception:
                     pass
 
-        def _update_background(self) -> None:
-            if self._bg_pixmap is None:
-                return
-            size = self.size()
-            if size.width() <= 0 or size.height() <= 0:
-                return
+        def _roster_header(self, title: str, edit: _RosterEdit) -> QHBoxLayout:
+            row = QHBoxLayout()
+            row.addWidget(QLabel(title))
+            row.addStretch(1)
+            btn_import = QPushButton("导入文件…")
+            btn_import.setToolTip("从 .txt/.csv/.xlsx 文件读取名单（CSV/Excel 读取第一列）")
+            btn_import.clicked.connect(lambda: self._import_roster(edit))
+            row.addWidget(btn_import)
+            return row
+
+        def _import_roster(self, edit: _RosterEdit) -> None:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "导入名单", os.getcwd(), "名单文件 (*.txt *.csv *.xlsx);;所有文件 (*)"
+            )
+            if path:
+                self.load_roster_file(edit, path)
 
-            scaled = self._bg_pixmap.scaled(
-                size,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation,
+        def load_roster_file(self, edit: _RosterEdit, path: str) -> bool:
+            """Replace ``edit``'s roster with the file at ``path``; warn and return False on failure."""
+            try:
+                # Chunks go straight into the document as the file is read.
+                edit.load_chunks(iter_roster_file(path))
+            except (ValueError, RuntimeError, OSError) as e:
+                QMessageBox.warning(self, "导入失败", str(e))
+                return False
+            return True
+
+        def _bind_roster(self, edit: _RosterEdit, roster: RosterLines) -> None:
+            doc = edit.document()
+
+            def _block_text(block) -> str:
+                # Match toPlainText(): non-breaking spaces become spaces.
+                return block.text().replace("\u00a0", " ")
+
+            def _on_contents_change(position: int, removed: int, added: int) -> None:
+                first = doc.findBlock(position).blockNumber()
+                last = doc.findBlock(position + added).blockNumber()
+                if first < 0 or last < first:
+                    roster.reset(edit.iter_lines())
+                    return
+                new_count = last - first + 1
+                removed_lines = new_count - (doc.blockCount() - roster.line_count)
+                if removed_lines < 0 or first + removed_lines > roster.line_count:
+                    roster.reset(edit.iter_lines())
+                    return
+                lines = []
+                block = doc.findBlockByNumber(first)
+                for _ in range(new_count):
+                    lines.append(_block_text(block))
+                    block = block.next()
+                roster.replace_lines(first, removed_lines, lines)
+
+            doc.contentsChange.connect(_on_contents_change)
+
+        def load_background(self, on_done=None) -> bool:
+            """Decode the background image on a worker thread and apply it when ready.
+
+            ``on_done(seconds)`` is called on the GUI thread with the decode time.
+            Returns ``False`` if there is no background image to load.
+            """
+            bg_path = ASSETS_DIR / "backgroud-picture.jpg"
+            if not bg_path.exists():
+                return False
+            signals = _ImageSignals(self)
+
+            def _loaded(image, seconds: float) -> None:
+                if image is not None:
+                    self._backdrop.set_source(QPixmap.fromImage(image))
+                if on_done is not None:
+                    on_done(seconds)
+
+            signals.loaded.connect(_loaded)
+            self._bg_signals = signals
+            QThreadPool.globalInstance().start(_ImageLoadJob(bg_path, signals))
+            return True
+
+        def _start_validation(self) -> None:
+            self._validation_generation += 1
+            # Queued jobs are stale now; a running one notices and stops.
+            self._validation_pool.clear()
+            job = _ValidationJob(
+                self._validation_generation,
+                self._students_roster.snapshot(),
+                self._teachers_roster.snapshot(),
+                int(self.per_spin.value()),
+                self._validation_signals,
+                lambda: self._validation_generation,
             )
-            canvas = QPixmap(size)
-            canvas.fill(Qt.transparent)
-
-            painter = QPainter(canvas)
-            x = (size.width() - scaled.width()) // 2
-            y = (size.height() - scaled.height()) // 2
-            painter.drawPixmap(x, y, scaled)
-            painter.end()
-
-            brush = QBrush(canvas)
-            palette = self.palette()
-            palette.setBrush(QPalette.Window, brush)
-            self.setAutoFillBackground(True)
-            self.setPalette(palette)
-
-            central = getattr(self, "_central_widget", None)
-            if central is not None:
-                cpal = central.palette()
-                cpal.setBrush(QPalette.Window, brush)
-                central.setAutoFillBackground(True)
-                central.setPalette(cpal)
-
-        def resizeEvent(self, event):  # type: ignore[override]
-            super().resizeEvent(event)
-            self._update_background()
+            self._validation_pool.start(job)
+
+        def _show_validation(self, generation: int, summary: RosterSummary) -> None:
+            if generation != self._validation_generation:
+                return
+            available = summary.students_available
+            needed = summary.total_needed
+            text = f"学生 {available} 人（已去除重复 {summary.student_duplicates} 条）｜老师合计需要 {needed} 人"
+            if summary.teacher_duplicates:
+                text += f"｜重复老师 {summary.teacher_duplicates} 条"
+            if summary.balanced:
+                text += "｜人数一致"
+            elif summary.desired:
+                text += f"｜相差 {abs(needed - available)} 人"
+            shown = list(summary.desired.items())[:20]
+            if shown:
+                text += "\n各老师人数：" + "、".join(f"{t} {n}" for t, n in shown)
+                if len(summary.desired) > len(shown):
+                    text += f" 等 {len(summary.desired)} 位"
+            self.validation_label.setText(text)
 
         def _open_dir(self) -> None:
             _try_open_directory(self.save_dir_edit.text().strip() or ".")
@@ -358,11 +740,20 @@ def main() -> None:
                 geometry=self.saveGeometry().hex(),
                 font_size=self._current_font_size,
                 welcome_font_size=int(self.welcome_font_spin.value()),
+                export_format=self.format_combo.currentData() or "xlsx",
+                export_layout=self.layout_combo.currentData() or "wide",
             )
             try:
                 s.save()
             except Exception:
                 pass
+            self._validation_timer.stop()
+            self._validation_generation += 1
+            self._validation_pool.clear()
+            self._validation_pool.waitForDone()
+            if self._grouping_cancel is not None:
+                self._grouping_cancel.set()
+            self._grouping_pool.waitForDone()
             super().closeEvent(event)
 
         def _change_font_size(self, delta: int) -> None:
@@ -373,77 +764,154 @@ def main() -> None:
                 size_int = max(8, min(32, int(size)))
             except (TypeError, ValueError):
                 size_int = 10
-            font = self._app.font()
-            font.setPointSize(size_int)
-            self._app.setFont(font)
-            self.setFont(font)
-            for widget in self.findChildren(QWidget):
-                widget.setFont(font)
+            # The global stylesheet pins the font of every polished widget, so
+            # setFont on the window does not reach its children. A single rule
+            # on the window re-resolves all descendants in one pass, including
+            # widgets created later (status bar, message boxes).
+            family = self._app.font().family().replace('"', "")
+            self.setStyleSheet(f'* {{ font-family: "{family}"; font-size: {size_int}pt; }}')
             self._current_font_size = size_int
 
         def _run_grouping(self) -> None:
+            if self._grouping_cancel is not None:
+                return
             # compute fresh seed based on timestamp
             seed = compute_seed_from_timestamp()
             self.seed_val = seed
             self.seed_label.setText(f"当前随机种子：{seed}")
 
-            students = parse_names_block(self.students_edit.toPlainText())
-            teachers, counts = parse_teachers_with_counts(self.teachers_edit.toPlainText())
             per = int(self.per_spin.value())
 
-            if not teachers:
+            # Cheap checks stay here; parsing, grouping and export run off-thread.
+            if not self._teachers_roster.unique_count:
                 QMessageBox.warning(self, "提示", "请录入至少1位老师。")
                 return
             if per <= 0:
                 QMessageBox.warning(self, "提示", "每位老师分配学生数应大于0。")
                 return
-            if not students:
+            if not self._students_roster.unique_count:
                 QMessageBox.warning(self, "提示", "请录入学生名单。")
                 return
 
-            desired_counts = determine_desired_counts(teachers, per, counts)
-            total_needed = sum(desired_counts.values())
-            total_students = len(students)
-            if total_students != total_needed:
-                QMessageBox.warning(
-                    self,
-                    "人数有误",
-                    (
-                        f"学生总数为 {total_students} 人，"
-                        f"但老师分配人数合计为 {total_needed} 人。\n"
-                        "请检查老师人数设置或学生名单后再试。"
-                    ),
-                )
+            fmt = self.format_combo.currentData() or "xlsx"
+            layout = self.layout_combo.currentData() or "wide"
+            try:
+                exporter = get_exporter(fmt)
+            except (ValueError, RuntimeError) as e:
+                QMessageBox.warning(self, "提示", str(e))
                 return
 
-            groups = group_students(students, teachers, per, seed, counts)
-
-            # Export
             stamp = _dt.datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"Grouper_{stamp}_{seed}.xlsx"
+            filename = f"Grouper_{stamp}_{seed}{exporter.extension}"
             save_dir = Path(self.save_dir_edit.text().strip() or ".").resolve()
             save_dir.mkdir(parents=True, exist_ok=True)
-            out = save_dir / filename
-            try:
-                _export_xlsx(out, groups, seed)
-            except Exception as e:
-                QMessageBox.critical(self, "导出失败", str(e))
-                return
 
+            cancel = threading.Event()
+            signals = _GroupingSignals(self)
+            signals.progress.connect(self._on_grouping_progress)
+            signals.rejected.connect(self._on_grouping_rejected)
+            signals.failed.connect(self._on_grouping_failed)
+            signals.cancelled.connect(self._on_grouping_cancelled)
+            signals.finished.connect(self._on_grouping_finished)
+            job = _GroupingJob(
+                seed,
+                self._students_roster.snapshot(),
+                self._teachers_roster.snapshot(),
+                per,
+                save_dir / filename,
+                exporter.key,
+                layout,
+                signals,
+                cancel,
+            )
+            self._grouping_cancel = cancel
+            self._grouping_signals = signals
+            self.btn_go.setEnabled(False)
+            self.btn_cancel.setEnabled(True)
+            self.btn_cancel.setVisible(True)
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("正在解析…")
+            self.progress_bar.setVisible(True)
+            self._grouping_pool.start(job)
+
+        def _cancel_grouping(self) -> None:
+            if self._grouping_cancel is not None:
+                self._grouping_cancel.set()
+                self.btn_cancel.setEnabled(False)
+                self.progress_bar.setFormat("正在取消…")
+
+        def _end_grouping(self) -> None:
+            self._grouping_cancel = None
+            self._grouping_signals = None
+            self.btn_go.setEnabled(True)
+            self.btn_cancel.setVisible(False)
+            self.progress_bar.setVisible(False)
+
+        def _on_grouping_progress(self, step: int, label: str) -> None:
+            self.progress_bar.setValue(step)
+            self.progress_bar.setFormat(label)
+
+        def _on_grouping_rejected(self, title: str, message: str) -> None:
+            self._end_grouping()
+            QMessageBox.warning(self, title, message)
+
+        def _on_grouping_failed(self, message: str) -> None:
+            self._end_grouping()
+            QMessageBox.critical(self, "导出失败", message)
+
+        def _on_grouping_cancelled(self) -> None:
+            self._end_grouping()
+            self.statusBar().showMessage("已取消分组。", 5000)
+
+        def _on_grouping_finished(self, out: str) -> None:
+            self._end_grouping()
+            self.statusBar().showMessage(f"分组完成，已保存到：{out}", 10000)
+            # Non-modal, so the window stays usable while the notice is up.
             msg = QMessageBox(self)
+            msg.setAttribute(Qt.WA_DeleteOnClose)
+            msg.setWindowModality(Qt.NonModal)
             msg.setIcon(QMessageBox.Information)
             msg.setWindowTitle("分组完成！")
             msg.setText(f"已保存到：\n{out}")
             open_btn = msg.addButton("打开文件", QMessageBox.ActionRole)
             msg.addButton("确定", QMessageBox.AcceptRole)
-            msg.exec()
-            if msg.clickedButton() == open_btn:
-                QDesktopServices.openUrl(QUrl.fromLocalFile(str(out)))
-
-    win = Main(settings)
-    if splash is not None:
-        splash.finish(win)
-    win.show()
+            msg.buttonClicked.connect(
+                lambda button: QDesktopServices.openUrl(QUrl.fromLocalFile(out)) if button is open_btn else None
+            )
+            msg.show()
+
+    # Set before the widgets exist, so each is polished once instead of
+    # being re-styled when the sheet is applied to a built window.
+    with profile.phase("应用样式表"):
+        app.setStyleSheet(load_styles())
+    with profile.phase("构建主窗口"):
+        win = Main(settings)
+    with profile.phase("显示主窗口"):
+        if splash is not None:
+            splash.finish(win)
+        win.show()
+
+    def _finish_profile() -> None:
+        profile.mark("启动完成")
+        if profile.enabled:
+            profile.emit()
+            # exit() rather than quit(): no close events, so settings stay untouched.
+            app.exit(0)
+
+    def _after_first_paint() -> None:
+        profile.mark("首次绘制")
+        with profile.phase("选择中文字体"):
+            _apply_cjk_font()
+            win._apply_font_size(win._current_font_size)
+
+        def _background_done(seconds: float) -> None:
+            profile.add("解码背景图（后台线程）", seconds)
+            _finish_profile()
+
+        if not win.load_background(_background_done):
+            _finish_profile()
+
+    QTimer.singleShot(0, _after_first_paint)
     sys.exit(app.exec())
 
 
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def digest_text(*parts: str) -> str:
+    """Return a stable digest of ``parts`` after normalising line endings.
+
+    Only differences that cannot change parse results are normalised away
+    (``\\r\\n`` vs ``\\n`` and leading/trailing whitespace of the whole text).
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        data = (part or "").replace("\r\n", "\n").strip().encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class LRUCache:
+    """A thread-safe LRU cache bounded by entry count, age and optionally size.
+
+    ``sizeof`` returns the byte cost of a value; when ``max_bytes`` is set the
+    least recently used entries are evicted until the total fits. ``on_evict``
+    is called with ``(key, value)`` for every entry that leaves the cache other
+    than by being overwritten, outside the lock.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.max_bytes = max_bytes if max_bytes and max_bytes > 0 else None
+        self._sizeof = sizeof or (lambda _value: 0)
+        self._on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key: Hashable) -> Any:
+        _, size, value = self._data.pop(key)
+        self._bytes -= size
+        return value
+
+    def _notify(self, evicted: List[Tuple[Hashable, Any]]) -> None:
+        if self._on_evict is not None:
+            for key, value in evicted:
+                self._on_evict(key, value)
+
+    def _expired(self, item: tuple, now: float) -> bool:
+        return self.ttl is not None and now - item[0] > self.ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        evicted: List[Tuple[Hashable, Any]] = []
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self._expired(item, time.monotonic()):
+                evicted.append((key, self._drop(key)))
+                self.evictions += 1
+                item = None
+            if item is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        self._notify(evicted)
+        return default if item is None else item[2]
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """Store ``value``; return ``False`` if it was refused (cache disabled or too large)."""
+        if self.max_entries == 0:
+            return False
+        size = int(self._sizeof(value))
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        evicted: List[Tuple[Hashable, Any]] = []
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic(), size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                evicted.append((oldest, self._drop(oldest)))
+                self.evictions += 1
+        self._notify(evicted)
+        return True
+
+    def prune(self) -> int:
+        """Drop expired entries now instead of on their next lookup; return how many."""
+        if self.ttl is None:
+            return 0
+        evicted: List[Tuple[Hashable, Any]] = []
+        now = time.monotonic()
+        with self._lock:
+            # Entries are in recency order, not insertion order, so scan them all.
+            for key in [k for k, item in self._data.items() if self._expired(item, now)]:
+                evicted.append((key, self._drop(key)))
+                self.evictions += 1
+        self._notify(evicted)
+        return len(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove ``key`` without counting it as an eviction."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._drop(key)
+
+    def get_or_compute(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            evicted = [(key, item[2]) for key, item in self._data.items()]
+            self._data.clear()
+            self._bytes = 0
+        self._notify(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,279 @@
+"""Headless command-line grouping (``grouper-cli``).
+
+Only :mod:`grouper.logic`, :mod:`grouper.export` and :mod:`grouper.upload`
+are imported, never PySide6 or Flask, so the command is cheap enough to run
+from cron or shell pipelines.
+
+Single run: rosters come from files (``.txt``/``.csv``/``.xlsx``) or ``-``
+for stdin, and the export goes to ``--output`` or stdout::
+
+    grouper-cli -t teachers.txt -s students.csv --seed 42 -f csv > groups.csv
+    cat students.txt | grouper-cli -t teachers.txt -s - -f jsonl
+
+Batch run: every ``NAME.teachers.EXT`` / ``NAME.students.EXT`` pair in a
+directory is grouped in parallel and written as ``NAME.groups.EXT`` in
+``--out-dir``, followed by a summary report::
+
+    grouper-cli --batch rosters/ --out-dir results/ -f xlsx --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from grouper.export import LAYOUTS, available_exporters, export_groups, get_exporter
+from grouper.logic import (
+    check_roster,
+    compute_seed_from_timestamp,
+    group_students,
+    iter_names,
+    parse_teachers_with_counts,
+)
+from grouper.upload import UPLOAD_EXTENSIONS, iter_upload
+
+# Formats that are safe to print on a terminal.
+_TEXT_FORMATS = ("csv", "jsonl")
+
+
+@contextlib.contextmanager
+def _roster_chunks(path: str, column: str = "", count_column: str = "") -> Iterator[Iterator[str]]:
+    """Open a roster file (or stdin for ``-``) as text chunks for the parsers."""
+    if path == "-":
+        yield iter_upload(sys.stdin.buffer, "stdin.txt")
+        return
+    # Files without an extension are read as plain text.
+    name = path if Path(path).suffix else f"{path}.txt"
+    with open(path, "rb") as fh:
+        yield iter_upload(fh, name, column, count_column)
+
+
+def run_roster(
+    teachers_path: str,
+    students_path: str,
+    target: Any,
+    per_teacher: int = 1,
+    seed: Optional[int] = None,
+    fmt: str = "csv",
+    layout: str = "wide",
+    teachers_column: str = "",
+    count_column: str = "",
+    students_column: str = "",
+) -> Dict[str, Any]:
+    """Group one roster pair and export it to ``target`` (a path or binary file).
+
+    Returns a summary dict. Raises ``ValueError`` for unusable rosters and
+    ``OSError`` for unreadable files or unwritable targets.
+    """
+    start = time.perf_counter()
+    with _roster_chunks(teachers_path, teachers_column, count_column) as chunks:
+        teachers, counts = parse_teachers_with_counts(chunks)
+    with _roster_chunks(students_path, students_column) as chunks:
+        students = list(iter_names(chunks))
+    check_roster(teachers, students, per_teacher, counts)
+
+    if seed is None:
+        seed = compute_seed_from_timestamp()
+    groups = group_students(students, teachers, per_teacher, seed, counts)
+    export_groups(target, groups, seed, fmt, layout)
+    assigned = sum(len(members) for members in groups.values())
+    return {
+        "seed": seed,
+        "teacher_count": len(teachers),
+        "student_count": len(students),
+        "assigned_students": assigned,
+        "unassigned_count": len(students) - assigned,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def find_pairs(directory: Path) -> List[Dict[str, Any]]:
+    """Match ``NAME.teachers.EXT`` with ``NAME.students.EXT`` files in ``directory``.
+
+    Entries whose partner is missing carry an ``error`` instead of paths.
+    """
+    found: Dict[str, Dict[str, Path]] = {}
+    for path in sorted(directory.iterdir()):
+        if not path.is_file() or path.suffix.lower() not in UPLOAD_EXTENSIONS:
+            continue
+        stem = path.name[: -len(path.suffix)]
+        for role in ("teachers", "students"):
+            if stem.endswith(f".{role}"):
+                found.setdefault(stem[: -len(role) - 1], {})[role] = path
+    pairs = []
+    for name, roles in sorted(found.items()):
+        entry: Dict[str, Any] = {"name": name}
+        if "teachers" in roles and "students" in roles:
+            entry["teachers"] = str(roles["teachers"])
+            entry["students"] = str(roles["students"])
+        else:
+            missing = "students" if "teachers" in roles else "teachers"
+            entry["error"] = f"缺少 {name}.{missing}.* 文件"
+        pairs.append(entry)
+    return pairs
+
+
+def _run_pair(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Process-pool entry point for one batch pair; errors are reported, not raised."""
+    report = {"name": task["name"], "output": task["output"]}
+    try:
+        report.update(
+            run_roster(
+                task["teachers"],
+                task["students"],
+                task["output"],
+                task["per_teacher"],
+                task["seed"],
+                task["format"],
+                task["layout"],
+                task["teachers_column"],
+                task["count_column"],
+                task["students_column"],
+            )
+        )
+        report["status"] = "ok"
+    except (ValueError, RuntimeError, OSError) as exc:
+        report["status"] = "failed"
+        report["error"] = str(exc)
+    return report
+
+
+def run_batch(pairs: Sequence[Dict[str, Any]], jobs: int) -> List[Dict[str, Any]]:
+    """Run batch tasks across ``jobs`` processes, returning reports in input order."""
+    if jobs <= 1 or len(pairs) <= 1:
+        return [_run_pair(task) for task in pairs]
+    # Only batch mode pays for the process-pool import.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pairs))) as pool:
+        return list(pool.map(_run_pair, pairs))
+
+
+def _print_table(reports: Sequence[Dict[str, Any]], elapsed: float, out) -> None:
+    out.write(f"{'名称':<20}{'状态':<8}{'老师':>6}{'学生':>8}{'已分配':>8}{'种子':>12}{'耗时(s)':>10}\n")
+    for r in reports:
+        if r["status"] == "ok":
+            out.write(
+                f"{r['name']:<20}{'完成':<8}{r['teacher_count']:>6}{r['student_count']:>8}"
+                f"{r['assigned_students']:>8}{r['seed']:>12}{r['seconds']:>10.3f}\n"
+            )
+        else:
+            out.write(f"{r['name']:<20}{'失败':<8}{r['error']}\n")
+    failed = sum(1 for r in reports if r["status"] != "ok")
+    out.write(f"共 {len(reports)} 组，成功 {len(reports) - failed}，失败 {failed}，用时 {elapsed:.2f} 秒\n")
+
+
+def _parser() -> argparse.ArgumentParser:
+    formats = [exporter.key for exporter in available_exporters()]
+    parser = argparse.ArgumentParser(
+        prog="grouper-cli",
+        description="学生-老师随机分组（命令行版）。",
+    )
+    source = parser.add_argument_group("单次分组")
+    source.add_argument("-t", "--teachers", help="老师名单文件（.txt/.csv/.xlsx），- 表示标准输入")
+    source.add_argument("-s", "--students", help="学生名单文件（.txt/.csv/.xlsx），- 表示标准输入")
+    source.add_argument("-o", "--output", default="-", help="输出文件，默认 - 表示标准输出")
+    batch = parser.add_argument_group("批量分组")
+    batch.add_argument("--batch", metavar="DIR", help="处理目录中所有 NAME.teachers.* / NAME.students.* 名单对")
+    batch.add_argument("--out-dir", metavar="DIR", help="批量结果输出目录，默认与名单目录相同")
+    batch.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数，默认 CPU 核数")
+    batch.add_argument("--json", action="store_true", help="以 JSON 输出批量汇总")
+    parser.add_argument("-n", "--per-teacher", type=int, default=1, help="默认每位老师的学生数，默认 1")
+    parser.add_argument("--seed", type=int, help="随机种子；批量时第 i 组使用 seed+i。默认按当前时间生成")
+    parser.add_argument("-f", "--format", default="csv", choices=formats, help="导出格式，默认 csv")
+    parser.add_argument("--layout", default="wide", choices=LAYOUTS, help="导出布局，默认 wide")
+    parser.add_argument("--teachers-column", default="", help="CSV/XLSX 中老师姓名所在列（列名、序号或字母）")
+    parser.add_argument("--count-column", default="", help="CSV/XLSX 中老师人数所在列（可选）")
+    parser.add_argument("--students-column", default="", help="CSV/XLSX 中学生姓名所在列（列名、序号或字母）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不在标准错误输出摘要")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.per_teacher < 0:
+        parser.error("每位老师的学生数必须是非负整数。")
+    exporter = get_exporter(args.format)
+
+    if args.batch:
+        if args.teachers or args.students:
+            parser.error("--batch 不能与 -t/-s 同时使用。")
+        directory = Path(args.batch)
+        if not directory.is_dir():
+            parser.error(f"目录不存在：{directory}")
+        out_dir = Path(args.out_dir) if args.out_dir else directory
+        out_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        reports = []
+        tasks = []
+        for i, pair in enumerate(find_pairs(directory)):
+            if "error" in pair:
+                reports.append({"name": pair["name"], "status": "failed", "error": pair["error"]})
+                continue
+            tasks.append(
+                {
+                    **pair,
+                    "output": str(out_dir / f"{pair['name']}.groups{exporter.extension}"),
+                    "per_teacher": args.per_teacher,
+                    "seed": None if args.seed is None else args.seed + i,
+                    "format": exporter.key,
+                    "layout": args.layout,
+                    "teachers_column": args.teachers_column,
+                    "count_column": args.count_column,
+                    "students_column": args.students_column,
+                }
+            )
+        if not tasks and not reports:
+            parser.error(f"目录中没有找到名单对：{directory}")
+        reports = sorted(reports + run_batch(tasks, args.jobs), key=lambda r: r["name"])
+        elapsed = time.perf_counter() - start
+        if args.json:
+            summary = {"seconds": round(elapsed, 4), "jobs": reports}
+            sys.stdout.write(json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+        else:
+            _print_table(reports, elapsed, sys.stdout)
+        return 1 if any(r["status"] != "ok" for r in reports) else 0
+
+    if not args.teachers or not args.students:
+        parser.error("请通过 -t 和 -s 指定老师与学生名单，或使用 --batch。")
+    if args.teachers == "-" and args.students == "-":
+        parser.error("老师与学生名单不能同时来自标准输入。")
+    to_stdout = args.output == "-"
+    if to_stdout and exporter.key not in _TEXT_FORMATS and sys.stdout.isatty():
+        parser.error(f"{exporter.label} 是二进制格式，请用 -o 指定输出文件或重定向标准输出。")
+
+    try:
+        summary = run_roster(
+            args.teachers,
+            args.students,
+            sys.stdout.buffer if to_stdout else args.output,
+            args.per_teacher,
+            args.seed,
+            exporter.key,
+            args.layout,
+            args.teachers_column,
+            args.count_column,
+            args.students_column,
+        )
+    except (ValueError, RuntimeError, OSError) as exc:
+        sys.stderr.write(f"错误：{exc}\n")
+        return 1
+    if to_stdout:
+        sys.stdout.flush()
+    if not args.quiet:
+        sys.stderr.write(
+            f"种子 {summary['seed']}：{summary['teacher_count']} 位老师，{summary['student_count']} 名学生，"
+            f"已分配 {summary['assigned_students']} 名\n"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -76,6 +76,8 @@ else:
 X86_64_DIR = RUNTIME_DIR / "x86_64"
 ASSETS_DIR = X86_64_DIR / "assets"
 SETTINGS_FILE = X86_64_DIR / "settings.json"
+# Derived files that are safe to delete, e.g. the pre-scaled splash image.
+CACHE_DIR = X86_64_DIR / "cache"
 
 
 if _is_packaged():
@@ -102,6 +104,8 @@ class Settings:
     geometry: Optional[str] = None  # Qt geometry serialized as hex string
     font_size: int = 10
     welcome_font_size: int = 24
+    export_format: str = "xlsx"
+    export_layout: str = "wide"
 
     @classmethod
     def load(cls) -> "Settings":
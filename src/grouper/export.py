@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import contextlib
+import csv
+import importlib.util
+import io
+import json
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, Union
+
+GroupRows = Union[Mapping[str, Sequence[str]], Iterable[Tuple[str, Sequence[str]]]]
+Target = Union[str, Path, BinaryIO]
+
+# "wide": one row per teacher with all students; "long": one row per student.
+LAYOUTS = ("wide", "long")
+LAYOUT_LABELS = {"wide": "每位老师一行", "long": "每位学生一行"}
+
+# Rows per Arrow record batch when streaming Parquet/Arrow output.
+_ARROW_BATCH_ROWS = 65536
+
+
+def _iter_groups(groups: GroupRows) -> Iterable[Tuple[str, Sequence[str]]]:
+    if isinstance(groups, Mapping):
+        return groups.items()
+    return groups
+
+
+def _check_layout(layout: str) -> None:
+    if layout not in LAYOUTS:
+        raise ValueError(f"未知的导出布局：{layout}")
+
+
+@contextlib.contextmanager
+def _binary_target(target: Target) -> Iterator[BinaryIO]:
+    """Yield a binary file for ``target``, closing it only if opened here."""
+    if isinstance(target, (str, Path)):
+        with open(target, "wb") as fh:
+            yield fh
+    else:
+        yield target
+
+
+@contextlib.contextmanager
+def _text_target(target: Target) -> Iterator[io.TextIOBase]:
+    with _binary_target(target) as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            yield text
+        finally:
+            text.flush()
+            text.detach()
+
+
+def write_xlsx(target: Target, groups: GroupRows, seed: int, layout: str = "wide") -> None:
+    """Stream ``groups`` into an XLSX workbook at ``target`` (a path or binary file).
+
+    Uses openpyxl's write-only mode: rows are serialised as they are appended
+    instead of being kept as cell objects, so memory stays flat however many
+    teachers there are. ``groups`` may be a mapping or any iterable of
+    ``(teacher, students)`` pairs, e.g. a generator producing groups lazily.
+    The ``wide`` layout matches the previous exporter: a ``Groups`` sheet with
+    one ``Teacher, Students`` row per teacher and a ``Summary`` sheet.
+    """
+    try:
+        from openpyxl import Workbook
+    except Exception as exc:  # pragma: no cover - runtime dependency import guard
+        raise RuntimeError("缺少 openpyxl，请先安装：pip install openpyxl") from exc
+    _check_layout(layout)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Groups")
+    teachers = 0
+    total_students = 0
+    if layout == "wide":
+        ws.append(["Teacher", "Students"])
+        for teacher, students in _iter_groups(groups):
+            ws.append([teacher, ", ".join(students)])
+            teachers += 1
+            total_students += len(students)
+    else:
+        ws.append(["Teacher", "Student"])
+        for teacher, students in _iter_groups(groups):
+            for student in students:
+                ws.append([teacher, student])
+            teachers += 1
+            total_students += len(students)
+
+    ws_summary = wb.create_sheet("Summary")
+    ws_summary.append(["Seed", seed])
+    ws_summary.append(["Teachers", teachers])
+    ws_summary.append(["Assigned Students", total_students])
+    wb.save(str(target) if isinstance(target, Path) else target)
+
+
+def write_csv(target: Target, groups: GroupRows, seed: int, layout: str = "wide") -> None:
+    """Write UTF-8 CSV; ``wide`` joins each teacher's students with ``", "``."""
+    _check_layout(layout)
+    with _text_target(target) as fh:
+        writer = csv.writer(fh)
+        if layout == "wide":
+            writer.writerow(["teacher", "students"])
+            writer.writerows((teacher, ", ".join(students)) for teacher, students in _iter_groups(groups))
+        else:
+            writer.writerow(["teacher", "student"])
+            for teacher, students in _iter_groups(groups):
+                writer.writerows((teacher, student) for student in students)
+
+
+def write_jsonl(target: Target, groups: GroupRows, seed: int, layout: str = "wide") -> None:
+    """Write JSON Lines; ``wide`` records carry the students as a list."""
+    _check_layout(layout)
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    with _text_target(target) as fh:
+        for teacher, students in _iter_groups(groups):
+            if layout == "wide":
+                fh.write(dumps({"teacher": teacher, "students": list(students)}))
+                fh.write("\n")
+            else:
+                for student in students:
+                    fh.write(dumps({"teacher": teacher, "student": student}))
+                    fh.write("\n")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("缺少 pyarrow，请先安装：pip install pyarrow") from exc
+    return pyarrow
+
+
+def _pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _arrow_batches(pa, groups: GroupRows, layout: str, schema) -> Iterator:
+    teachers: List[str] = []
+    values: List = []
+    for teacher, students in _iter_groups(groups):
+        if layout == "wide":
+            teachers.append(teacher)
+            values.append(list(students))
+        else:
+            teachers.extend([teacher] * len(students))
+            values.extend(students)
+        if len(teachers) >= _ARROW_BATCH_ROWS:
+            yield pa.record_batch([teachers, values], schema=schema)
+            teachers, values = [], []
+    if teachers:
+        yield pa.record_batch([teachers, values], schema=schema)
+
+
+def _arrow_schema(pa, layout: str, seed: int):
+    second = pa.field("students", pa.list_(pa.string())) if layout == "wide" else pa.field("student", pa.string())
+    return pa.schema([pa.field("teacher", pa.string()), second], metadata={"seed": str(seed)})
+
+
+def write_parquet(target: Target, groups: GroupRows, seed: int, layout: str = "wide") -> None:
+    """Write Parquet in record batches; the seed is stored as schema metadata."""
+    _check_layout(layout)
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, layout, seed)
+    with _binary_target(target) as fh, pq.ParquetWriter(fh, schema) as writer:
+        for batch in _arrow_batches(pa, groups, layout, schema):
+            writer.write_batch(batch)
+
+
+def write_arrow(target: Target, groups: GroupRows, seed: int, layout: str = "wide") -> None:
+    """Write an Arrow IPC file in record batches; the seed is schema metadata."""
+    _check_layout(layout)
+    pa = _require_pyarrow()
+
+    schema = _arrow_schema(pa, layout, seed)
+    with _binary_target(target) as fh, pa.ipc.new_file(fh, schema) as writer:
+        for batch in _arrow_batches(pa, groups, layout, schema):
+            writer.write_batch(batch)
+
+
+@dataclass(frozen=True)
+class Exporter:
+    """A registered output format."""
+
+    key: str
+    label: str
+    extension: str
+    mimetype: str
+    write: Callable[[Target, GroupRows, int, str], None]
+    available: Callable[[], bool] = lambda: True
+
+
+EXPORTERS: Dict[str, Exporter] = {}
+
+
+def register_exporter(exporter: Exporter) -> None:
+    EXPORTERS[exporter.key] = exporter
+
+
+register_exporter(
+    Exporter(
+        "xlsx",
+        "Excel (.xlsx)",
+        ".xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        write_xlsx,
+    )
+)
+register_exporter(Exporter("csv", "CSV (.csv)", ".csv", "text/csv", write_csv))
+register_exporter(Exporter("jsonl", "JSON Lines (.jsonl)", ".jsonl", "application/x-ndjson", write_jsonl))
+register_exporter(
+    Exporter("parquet", "Parquet (.parquet)", ".parquet", "application/vnd.apache.parquet", write_parquet, _pyarrow_available)
+)
+register_exporter(
+    Exporter("arrow", "Arrow (.arrow)", ".arrow", "application/vnd.apache.arrow.file", write_arrow, _pyarrow_available)
+)
+
+
+def available_exporters() -> List[Exporter]:
+    """Registered exporters whose dependencies are installed."""
+    return [e for e in EXPORTERS.values() if e.available()]
+
+
+def get_exporter(key: str) -> Exporter:
+    exporter = EXPORTERS.get(key)
+    if exporter is None:
+        raise ValueError(f"未知的导出格式：{key}")
+    if not exporter.available():
+        raise RuntimeError(f"导出格式 {exporter.label} 所需的依赖未安装。")
+    return exporter
+
+
+def export_groups(target: Target, groups: GroupRows, seed: int, fmt: str = "xlsx", layout: str = "wide") -> None:
+    """Write ``groups`` to ``target`` with the exporter registered as ``fmt``."""
+    get_exporter(fmt).write(target, groups, seed, layout)
+
+
+def export_bytes(groups: GroupRows, seed: int, fmt: str = "xlsx", layout: str = "wide") -> bytes:
+    """Return the output of :func:`export_groups` as bytes."""
+    buffer = BytesIO()
+    export_groups(buffer, groups, seed, fmt, layout)
+    return buffer.getvalue()
+
+
+def xlsx_bytes(groups: GroupRows, seed: int) -> bytes:
+    """Return the workbook produced by :func:`write_xlsx` as bytes."""
+    return export_bytes(groups, seed, "xlsx")
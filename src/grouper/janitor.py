@@ -0,0 +1,237 @@
+"""Retention for persisted web exports.
+
+:class:`ExportJanitor` keeps an index of the files the web app wrote, in
+creation order, and a background thread deletes the oldest ones once they
+exceed the configured age, total size or file count. The directory itself is
+never listed: the index lives in SQLite (``.grouper-exports.sqlite3`` in the
+root), shared by every web process, so quotas apply to all workers' files
+together and any worker's sweep can clean up after the others.
+
+Downloads take a lease on a file while opening it; a leased file is skipped
+by the sweep and retried on the next one. Leases are rows in the same
+database and deletions happen inside a write transaction, so a sweep in one
+process cannot race an open in another. Once opened, a download keeps
+reading even if the file is deleted afterwards (POSIX semantics); where the
+OS refuses to delete an open file, the entry stays indexed and is retried.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+DB_NAME = ".grouper-exports.sqlite3"
+
+# A lease older than this belongs to a process that died mid-open.
+_LEASE_TIMEOUT = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exports_created ON exports (created);
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    acquired REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_path ON leases (path);
+"""
+
+
+class ExportJanitor:
+    """Index of written export files with a background retention sweep.
+
+    ``max_age`` is in seconds; ``max_age``, ``max_bytes`` and ``max_files``
+    are disabled when ``None`` or ``0``. Limits cover every process that
+    shares ``root``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_files: Optional[int] = None,
+        interval: float = 300.0,
+    ) -> None:
+        self.root = Path(root)
+        self.max_age = max_age or None
+        self.max_bytes = max_bytes or None
+        self.max_files = max_files or None
+        self.interval = max(1.0, float(interval))
+        self._db = self.root / DB_NAME
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sweeps = 0
+        self.files_removed = 0
+        self.bytes_reclaimed = 0
+        self.last_sweep_seconds = 0.0
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    # -- storage -----------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._db, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _totals(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM exports").fetchone()
+        return count, total
+
+    def _over_quota(self, count: int, total: int) -> bool:
+        return (self.max_files is not None and count > self.max_files) or (
+            self.max_bytes is not None and total > self.max_bytes
+        )
+
+    def record(self, path: Path, size: Optional[int] = None) -> None:
+        """Track a file that was just written; wakes the sweep if a quota is exceeded."""
+        key = str(Path(path).resolve())
+        if size is None:
+            size = Path(path).stat().st_size
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO exports (path, size, created) VALUES (?, ?, ?)",
+                (key, int(size), time.time()),
+            )
+            quotas = self.max_files is not None or self.max_bytes is not None
+            over = quotas and self._over_quota(*self._totals(conn))
+        if over:
+            self._wake.set()
+
+    @contextlib.contextmanager
+    def lease(self, path: Path) -> Iterator[None]:
+        """Keep ``path`` from being deleted, by any process, while the block runs."""
+        key = str(Path(path).resolve())
+        with self._connect() as conn:
+            lease_id = conn.execute(
+                "INSERT INTO leases (path, acquired) VALUES (?, ?)", (key, time.time())
+            ).lastrowid
+        try:
+            yield
+        finally:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    def open(self, path: Path) -> BinaryIO:
+        """Open ``path`` for reading under a lease, so a sweep cannot race the open."""
+        with self.lease(path):
+            return open(path, "rb")
+
+    # -- sweep -------------------------------------------------------------
+
+    def _victims(self, conn: sqlite3.Connection, now: float) -> list:
+        """Pick entries to delete, oldest first."""
+        victims = []
+        count, total = self._totals(conn)
+        leased = {row[0] for row in conn.execute("SELECT DISTINCT path FROM leases")}
+        for path, size, created in conn.execute("SELECT path, size, created FROM exports ORDER BY created"):
+            expired = self.max_age is not None and now - created > self.max_age
+            if not expired and not self._over_quota(count, total):
+                # Later entries are newer, so nothing further is expired either.
+                break
+            if path in leased:
+                continue
+            victims.append((path, size))
+            count -= 1
+            total -= size
+        return victims
+
+    def sweep(self) -> Dict[str, int]:
+        """Delete files past the limits now; returns what this sweep removed."""
+        start = time.perf_counter()
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE acquired < ?", (now - _LEASE_TIMEOUT,))
+            victims = self._victims(conn, now)
+        removed = reclaimed = 0
+        for path, size in victims:
+            # Re-check and delete inside a write transaction, one file at a time,
+            # so a download that took a lease since selection is never cut off.
+            with self._transaction() as conn:
+                if conn.execute("SELECT 1 FROM leases WHERE path = ?", (path,)).fetchone():
+                    continue
+                if not conn.execute("SELECT 1 FROM exports WHERE path = ?", (path,)).fetchone():
+                    continue  # another process got here first
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue  # e.g. still open on Windows; retry next sweep
+                else:
+                    removed += 1
+                    reclaimed += size
+                conn.execute("DELETE FROM exports WHERE path = ?", (path,))
+        with self._lock:
+            self.sweeps += 1
+            self.files_removed += removed
+            self.bytes_reclaimed += reclaimed
+            self.last_sweep_seconds = time.perf_counter() - start
+        return {"files_removed": removed, "bytes_reclaimed": reclaimed}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.sweep()
+            except Exception:
+                # Retention must never take the web app down.
+                pass
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="grouper-export-janitor", daemon=True)
+            self._thread.start()
+            self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, float]:
+        """Index totals across all processes, plus this process's sweep counters."""
+        with self._connect() as conn:
+            count, total = self._totals(conn)
+        with self._lock:
+            return {
+                "files": count,
+                "bytes": total,
+                "sweeps": self.sweeps,
+                "files_removed": self.files_removed,
+                "bytes_reclaimed": self.bytes_reclaimed,
+                "last_sweep_seconds": self.last_sweep_seconds,
+            }
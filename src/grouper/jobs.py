@@ -0,0 +1,466 @@
+"""Background grouping jobs backed by SQLite.
+
+Submitting a job inserts a ``queued`` row and returns its id at once. Each
+web process runs a :class:`JobQueue` dispatcher thread that claims queued
+rows (atomically, so several processes can share one database) and runs
+them in a bounded process pool. Results are written next to the database as
+``<id>.json`` (groups) and ``<id><ext>`` (the export file), so they can be
+streamed from disk by any process.
+
+Jobs survive a restart: every queue registers a random instance token and
+refreshes a heartbeat while it runs, and claimed rows record that token.
+Rows still ``running`` under a token whose heartbeat has gone stale are put
+back in the queue. Process ids are not used for this, since a restarted
+container hands the same low pids out again. Finished jobs and their files
+are removed after ``ttl`` seconds.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_log = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    owner TEXT,
+    summary TEXT,
+    timings TEXT,
+    filename TEXT,
+    mimetype TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS instances (
+    token TEXT PRIMARY KEY,
+    pid INTEGER,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class QueueFull(Exception):
+    """Raised by :meth:`JobQueue.submit` when ``max_pending`` jobs are waiting."""
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    summary: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    filename: Optional[str] = None
+    mimetype: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def pending(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "summary": self.summary,
+            "timings": self.timings,
+            "filename": self.filename,
+            "error": self.error,
+        }
+
+
+def execute_job(spec: Dict[str, Any], out_base: str) -> Tuple[Dict[str, Any], Dict[str, float], Optional[str]]:
+    """Run one job in a pool process; returns ``(summary, timings, extension)``.
+
+    Groups go to ``out_base + ".json"`` and the export (if ``spec["format"]``
+    is set) to ``out_base + extension``, streamed straight to disk.
+    """
+    # Imported here: grouper.api imports this module for its routes.
+    from grouper.api import group_job
+    from grouper.export import export_groups, get_exporter
+
+    timings: Dict[str, float] = {}
+    result = group_job(spec, timings=timings)
+
+    start = time.perf_counter()
+    extension = None
+    if spec.get("format"):
+        extension = get_exporter(spec["format"]).extension
+        export_groups(out_base + extension, result["groups"], result["seed"], spec["format"], spec["layout"])
+    exported = time.perf_counter()
+    with open(out_base + ".json", "w", encoding="utf-8") as fh:
+        json.dump({"groups": result["groups"], "unassigned": result["unassigned"]}, fh, ensure_ascii=False)
+    timings["export"] = exported - start
+    timings["write"] = time.perf_counter() - exported
+
+    summary = {k: v for k, v in result.items() if k not in ("groups", "unassigned")}
+    summary["unassigned_count"] = len(result["unassigned"])
+    return summary, timings, extension
+
+
+class JobQueue:
+    """SQLite-backed job queue with a bounded process pool."""
+
+    def __init__(
+        self,
+        directory: Path,
+        workers: int = 1,
+        max_pending: int = 16,
+        ttl: Optional[float] = 24 * 3600,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.poll_interval = poll_interval
+        # Heartbeats are written every third of this; older ones mark the instance dead.
+        self.stale_after = max(30.0, 10 * poll_interval)
+        self.token = uuid.uuid4().hex
+        self._last_heartbeat = 0.0
+        self._last_reap = 0.0
+        self._db = self.directory / "jobs.sqlite3"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cleanup = 0.0
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._heartbeat(force=True)
+        self._requeue_orphans()
+
+    # -- storage -----------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._db, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    def _heartbeat(self, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_heartbeat < self.stale_after / 3:
+            return
+        self._last_heartbeat = now
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO instances (token, pid, heartbeat) VALUES (?, ?, ?)",
+                (self.token, os.getpid(), now),
+            )
+
+    def _requeue_orphans(self) -> None:
+        """Requeue ``running`` rows whose owning instance stopped heartbeating."""
+        cutoff = time.time() - self.stale_after
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM instances WHERE heartbeat < ?", (cutoff,))
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, started = NULL"
+                    " WHERE status = ? AND (owner IS NULL OR owner NOT IN (SELECT token FROM instances))",
+                    (QUEUED, RUNNING),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _row_to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            id=row["id"],
+            status=row["status"],
+            created=row["created"],
+            started=row["started"],
+            finished=row["finished"],
+            summary=json.loads(row["summary"]) if row["summary"] else {},
+            timings=json.loads(row["timings"]) if row["timings"] else {},
+            filename=row["filename"],
+            mimetype=row["mimetype"],
+            error=row["error"],
+        )
+
+    def pending_count(self) -> int:
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()
+        return count
+
+    def submit(self, spec: Dict[str, Any]) -> str:
+        """Queue ``spec`` (as validated by the API) and return the job id."""
+        job_id = secrets.token_urlsafe(12)
+        payload = json.dumps(spec, ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (count,) = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+                ).fetchone()
+                if count >= self.max_pending:
+                    raise QueueFull()
+                conn.execute(
+                    "INSERT INTO jobs (id, status, spec, created) VALUES (?, ?, ?, ?)",
+                    (job_id, QUEUED, payload, time.time()),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def result_path(self, job: Job) -> Path:
+        return self.directory / f"{job.id}.json"
+
+    def export_path(self, job: Job) -> Optional[Path]:
+        if not job.filename:
+            return None
+        return self.directory / (job.id + Path(job.filename).suffix)
+
+    # -- dispatch ------------------------------------------------------------
+
+    def _claim(self) -> Optional[Tuple[str, Dict[str, Any], float]]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, spec, created FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, owner = ?, started = ? WHERE id = ?",
+                        (RUNNING, self.token, time.time(), row["id"]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row["id"], json.loads(row["spec"]), row["created"]
+
+    def _finish(
+        self, job_id: str, spec: Dict[str, Any], created: float, pool: ProcessPoolExecutor, future: Future
+    ) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
+        finished = time.time()
+        # Only a row this instance still owns is updated: once stop() or another
+        # instance has requeued the job, a late result is dropped.
+        owned = " WHERE id = ? AND status = ? AND owner = ?"
+        try:
+            summary, timings, extension = future.result()
+        except Exception as exc:
+            message = str(exc) or exc.__class__.__name__
+            if isinstance(exc, BrokenProcessPool):
+                # A worker died (e.g. killed for memory); every job in flight on
+                # that pool fails and the next dispatch starts a fresh pool.
+                _log.warning("job %s lost its worker process: %s", job_id, exc)
+                self._drop_pool(pool)
+                message = "任务进程意外退出（可能内存不足），请缩小名单后重试。"
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished = ?, error = ?" + owned,
+                    (FAILED, finished, message, job_id, RUNNING, self.token),
+                )
+        else:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT started FROM jobs" + owned, (job_id, RUNNING, self.token)
+                ).fetchone()
+                if row is None:
+                    self._wake.set()
+                    return
+                started = row["started"]
+                timings = {"queued": (started or created) - created, **timings, "total": finished - created}
+                filename = None
+                if extension:
+                    stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(created))
+                    filename = f"Grouper_{stamp}_{summary['seed']}{extension}"
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished = ?, summary = ?, timings = ?, filename = ?, mimetype = ?"
+                    + owned,
+                    (
+                        DONE,
+                        finished,
+                        json.dumps(summary, ensure_ascii=False),
+                        json.dumps(timings),
+                        filename,
+                        _mimetype(spec.get("format")),
+                        job_id,
+                        RUNNING,
+                        self.token,
+                    ),
+                )
+        self._wake.set()
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._running) >= self.workers:
+                    return
+            claimed = self._claim()
+            if claimed is None:
+                return
+            job_id, spec, created = claimed
+            try:
+                pool, future = self._submit(job_id, spec)
+            except Exception:
+                # The row is already marked running under this instance; put it
+                # back so it is not stranded until this process exits.
+                self._requeue(job_id)
+                raise
+            with self._lock:
+                self._running[job_id] = future
+            future.add_done_callback(lambda f, j=job_id, s=spec, c=created, p=pool: self._finish(j, s, c, p, f))
+
+    def _current_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _submit(self, job_id: str, spec: Dict[str, Any]) -> Tuple[ProcessPoolExecutor, Future]:
+        """Submit to the pool, replacing it once if it is broken or shut down."""
+        pool = self._current_pool()
+        try:
+            return pool, pool.submit(execute_job, spec, str(self.directory / job_id))
+        except RuntimeError as exc:  # BrokenProcessPool, or shut down under us
+            _log.warning("job pool unusable, replacing it: %s", exc)
+            self._drop_pool(pool)
+        pool = self._current_pool()
+        return pool, pool.submit(execute_job, spec, str(self.directory / job_id))
+
+    def _drop_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is not pool:
+                return  # already replaced
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _requeue(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, started = NULL"
+                " WHERE id = ? AND status = ? AND owner = ?",
+                (QUEUED, job_id, RUNNING, self.token),
+            )
+
+    def _cleanup(self) -> None:
+        if self.ttl is None or time.monotonic() - self._last_cleanup < 60:
+            return
+        self._last_cleanup = time.monotonic()
+        cutoff = time.time() - self.ttl
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) AND finished < ?", (DONE, FAILED, cutoff)
+            ).fetchall()
+            for row in rows:
+                job = self._row_to_job(row)
+                for path in (self.result_path(job), self.export_path(job)):
+                    if path is not None:
+                        try:
+                            path.unlink()
+                        except OSError:
+                            pass
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._heartbeat()
+                if time.monotonic() - self._last_reap >= self.stale_after / 3:
+                    self._last_reap = time.monotonic()
+                    self._requeue_orphans()
+                self._dispatch()
+                self._cleanup()
+            except Exception:
+                # A transient database or pool error must not kill the dispatcher.
+                _log.exception("job dispatcher error")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="grouper-jobs", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop dispatching; running jobs go back to the queue for the next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        with self._lock:
+            self._running.clear()
+        # Clearing the owner also turns _finish() into a no-op for futures
+        # that complete after this point.
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, started = NULL"
+                " WHERE status = ? AND owner = ?",
+                (QUEUED, RUNNING, self.token),
+            )
+            conn.execute("DELETE FROM instances WHERE token = ?", (self.token,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update({row["status"]: row["n"] for row in rows})
+        counts["max_pending"] = self.max_pending
+        return counts
+
+
+def _mimetype(fmt: Optional[str]) -> Optional[str]:
+    if not fmt:
+        return None
+    from grouper.export import get_exporter
+
+    return get_exporter(fmt).mimetype
@@ -1,10 +1,40 @@
 from __future__ import annotations
 
 import hashlib
+import heapq
+import os
 import random
+import threading
 import time
 import re
-from typing import Dict, List, Sequence, Tuple
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Union
+
+
+_NAME_SEPARATORS = (",", "，", ";", "；", "\t")
+# Characters on which ``str.splitlines`` ends a row.
+_LINE_BREAKS = frozenset("\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029")
+_READ_CHUNK_SIZE = 1 << 20
+
+# Full teacher-line grammar, e.g. "Name: 3", "Name（3", "Name x3", "Name  3".
+# Only lines the fast lanes in ``parse_teacher_entry`` cannot settle reach it.
+_TEACHER_LINE = re.compile(
+    r"^\s*(?P<name>.+?)\s*(?:(?P<sep>[:：=\(（xX×])?\s*(?P<num>\d+)\)?\s*)?$"
+)
+_COUNT_SEPARATORS = ":：="
+_TEACHER_FORMATS = {
+    ":": "colon",
+    "：": "colon",
+    "=": "equals",
+    "(": "paren",
+    "（": "paren",
+    "x": "times",
+    "X": "times",
+    "×": "times",
+}
+
+_teacher_format_counts: Counter = Counter()
+_teacher_format_lock = threading.Lock()
 
 
 def compute_seed_from_timestamp() -> int:
@@ -18,6 +48,67 @@ def compute_seed_from_timestamp() -> int:
     return seed & 0x7FFFFFFF
 
 
+def _as_chunks(source: Union[str, Iterable[str]]) -> Iterable[str]:
+    """Return ``source`` (a string, open text file or iterable of chunks) as text chunks."""
+    if isinstance(source, str):
+        text = source
+        return (text[i : i + _READ_CHUNK_SIZE] for i in range(0, len(text), _READ_CHUNK_SIZE))
+    if hasattr(source, "read"):
+        reader = source.read
+        return iter(lambda: reader(_READ_CHUNK_SIZE), "")
+    return source
+
+
+def _iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Yield the non-empty, comment-stripped rows of ``chunks``; rows may span chunks."""
+    tail = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        # Separators are normalised per bounded chunk rather than over the
+        # whole input, so peak memory no longer scales with roster size.
+        for sep in _NAME_SEPARATORS:
+            chunk = chunk.replace(sep, "\n")
+        rows = chunk.splitlines()
+        rows[0] = tail + rows[0]
+        tail = "" if chunk[-1] in _LINE_BREAKS else rows.pop()
+        for raw in rows:
+            if "#" in raw:
+                raw = raw.partition("#")[0]
+            row = raw.strip()
+            if row:
+                yield row
+    row = tail.partition("#")[0].strip()
+    if row:
+        yield row
+
+
+def iter_names(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Lazily yield de-duplicated names from text or an iterable of text chunks.
+
+    ``source`` may be a string, an open text file (read in fixed-size blocks),
+    or any iterable of string chunks; rows may span chunk boundaries. The input
+    is scanned once and names are yielded in first-seen order, matching
+    :func:`parse_names_block`.
+    """
+    seen = set()
+    remember = seen.add
+    for name in _iter_lines(_as_chunks(source)):
+        if name not in seen:
+            remember(name)
+            yield name
+
+
+def iter_entries(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Yield the non-empty, comment-stripped rows of ``source`` without de-duplication.
+
+    Rows are split exactly as :func:`parse_names_block` and
+    :func:`parse_teachers_with_counts` split them. ``source`` may be a string,
+    an open text file or an iterable of chunks, as for :func:`iter_names`.
+    """
+    return _iter_lines(_as_chunks(source))
+
+
 def parse_names_block(text: str) -> List[str]:
     """Parse names from a multi-line text block.
 
@@ -27,24 +118,42 @@ def parse_names_block(text: str) -> List[str]:
     """
     if not text:
         return []
-    # Normalize separators
-    seps = [",", "，", ";", "；", "\t"]
-    for s in seps:
-        text = text.replace(s, "\n")
-    names = []
-    seen = set()
-    for raw in text.splitlines():
-        comment_stripped = raw.split("#", 1)[0]
-        name = comment_stripped.strip()
-        if not name:
-            continue
-        if name not in seen:
-            seen.add(name)
-            names.append(name)
-    return names
+    return list(iter_names(text))
+
+
+def parse_teacher_entry(line: str) -> Tuple[str, str | None, str]:
+    """Split one stripped teacher entry into ``(name, count digits, format)``.
+
+    Cheap string scans settle the common ``name:3`` / ``name 3`` forms; the
+    parenthesised and ``x``/``×`` notations fall back to ``_TEACHER_LINE``.
+    All paths agree with the regex on every input.
+    """
+    for candidate in _COUNT_SEPARATORS:
+        head, sep, tail = line.rpartition(candidate)
+        if sep and head:
+            num = tail.lstrip()
+            if num.isdecimal():
+                return head.rstrip(), num, _TEACHER_FORMATS[sep]
+    if line[-1].isdecimal():
+        start = len(line) - 1
+        while start > 1 and line[start - 1].isdecimal():
+            start -= 1
+        if start >= 1:
+            name = line[:start].rstrip()
+            if name[-1] not in _TEACHER_FORMATS:
+                return name, line[start:], "digits"
+    elif line[-1] != ")":
+        return line, None, "plain"
+    m = _TEACHER_LINE.match(line)
+    if not m:
+        return line, None, "plain"
+    num = m.group("num")
+    if not num:
+        return m.group("name").strip(), None, "plain"
+    return m.group("name").strip(), num, _TEACHER_FORMATS.get(m.group("sep") or "", "digits")
 
 
-def parse_teachers_with_counts(text: str) -> Tuple[List[str], Dict[str, int]]:
+def parse_teachers_with_counts(text: Union[str, Iterable[str]]) -> Tuple[List[str], Dict[str, int]]:
     """Parse teacher lines with optional per-teacher counts.
 
     Supports inline count notations such as:
@@ -59,30 +168,21 @@ def parse_teachers_with_counts(text: str) -> Tuple[List[str], Dict[str, int]]:
       (teachers, counts) where counts maps teacher name -> desired count.
 
     Any ``#`` comment marker and following text on a line is removed before parsing.
+    ``text`` may also be an open text file or an iterable of chunks (see
+    :func:`iter_entries`), so large rosters are parsed as they are read.
+    Each parsed line is tallied by notation; see :func:`teacher_format_stats`.
     """
     if not text:
         return [], {}
 
-    # Normalize common separators to newlines first
-    for s in [",", "，", ";", "；", "\t"]:
-        text = text.replace(s, "\n")
-
     teachers: List[str] = []
     counts: Dict[str, int] = {}
     seen = set()
+    formats: Counter = Counter()
 
-    # Regex to capture optional trailing integer with various separators
-    # e.g., "Name: 3", "Name（3）", "Name x3", "Name  3"
-    pat = re.compile(r"^\s*(?P<name>.+?)\s*(?:[:：=\(（xX×]?\s*(?P<num>\d+)\)?\s*)?$")
-
-    for raw in text.splitlines():
-        stripped = raw.split("#", 1)[0].strip()
-        if not stripped:
-            continue
-        m = pat.match(stripped)
-        if not m:
-            continue
-        name = (m.group("name") or "").strip()
+    for stripped in iter_entries(text):
+        name, num_str, fmt = parse_teacher_entry(stripped)
+        formats[fmt] += 1
         if not name:
             continue
         if name in seen:
@@ -90,7 +190,6 @@ def parse_teachers_with_counts(text: str) -> Tuple[List[str], Dict[str, int]]:
             continue
         seen.add(name)
         teachers.append(name)
-        num_str = m.group("num")
         if num_str:
             try:
                 n = int(num_str)
@@ -99,9 +198,24 @@ def parse_teachers_with_counts(text: str) -> Tuple[List[str], Dict[str, int]]:
             except ValueError:
                 pass
 
+    with _teacher_format_lock:
+        _teacher_format_counts.update(formats)
     return teachers, counts
 
 
+def teacher_format_stats(reset: bool = False) -> Dict[str, int]:
+    """Return how many teacher lines were parsed per count notation.
+
+    Keys are ``plain``, ``colon``, ``equals``, ``digits``, ``paren`` and
+    ``times``. Pass ``reset=True`` to clear the tallies after reading them.
+    """
+    with _teacher_format_lock:
+        stats = dict(_teacher_format_counts)
+        if reset:
+            _teacher_format_counts.clear()
+    return stats
+
+
 def determine_desired_counts(
     teachers: Sequence[str],
     per_teacher: int,
@@ -123,12 +237,29 @@ def determine_desired_counts(
     return desired
 
 
+def check_roster(
+    teachers: Sequence[str],
+    students: Sequence[str],
+    per_teacher: int,
+    per_teacher_counts: Dict[str, int] | None = None,
+) -> None:
+    """Raise ``ValueError`` with a user-facing message if the rosters cannot be grouped."""
+    if not teachers:
+        raise ValueError("请至少输入一位老师。")
+    if not students:
+        raise ValueError("请至少输入一位学生。")
+    counts = per_teacher_counts or {}
+    if sum(counts.get(t, per_teacher) for t in teachers) > len(students):
+        raise ValueError("老师期望的学生数超过学生总数，请检查输入。")
+
+
 def group_students(
     students: Sequence[str],
     teachers: Sequence[str],
     per_teacher: int,
     seed: int,
     per_teacher_counts: Dict[str, int] | None = None,
+    engine: str = "python",
 ) -> Dict[str, List[str]]:
     """Assign students to teachers using `seed` with optional per-teacher counts.
 
@@ -137,16 +268,32 @@ def group_students(
       If not specified, `per_teacher` is used as the default.
     - Teachers may receive fewer students if insufficient students remain.
     - Any leftover students remain unassigned.
+    - ``engine="numpy"`` uses the optional vectorised engine in
+      :mod:`grouper.numpy_engine`; see its module docs for the seed mapping.
     """
-    rng = random.Random(seed)
-    students_list = list(students)
+    if engine == "numpy":
+        from grouper.numpy_engine import group_students_numpy
+
+        return group_students_numpy(students, teachers, per_teacher, seed, per_teacher_counts)
+    if engine != "python":
+        raise ValueError(f"unknown engine {engine!r}")
     teachers_list = list(teachers)
+    desired = determine_desired_counts(teachers_list, per_teacher, per_teacher_counts)
+    return _shuffle_and_slice(list(students), teachers_list, desired, seed)
+
+
+def _shuffle_and_slice(
+    students_list: List[str],
+    teachers_list: Sequence[str],
+    desired: Dict[str, int],
+    seed: int,
+) -> Dict[str, List[str]]:
+    """Shuffle ``students_list`` in place with ``seed`` and slice it per teacher."""
+    rng = random.Random(seed)
     rng.shuffle(students_list)
 
     result: Dict[str, List[str]] = {t: [] for t in teachers_list}
 
-    desired = determine_desired_counts(teachers_list, per_teacher, per_teacher_counts)
-
     total_needed = sum(desired.values())
     total_take = min(len(students_list), total_needed)
     idx = 0
@@ -162,3 +309,136 @@ def group_students(
         idx += take_for_t
 
     return result
+
+
+# Shared inputs of a batch run, installed once per worker process.
+_batch_state: Tuple[Tuple[str, ...], Tuple[str, ...], Dict[str, int], Callable[..., float]] | None = None
+
+
+def _init_batch_worker(
+    students: Tuple[str, ...],
+    teachers: Tuple[str, ...],
+    desired: Dict[str, int],
+    score: Callable[..., float],
+) -> None:
+    global _batch_state
+    _batch_state = (students, teachers, desired, score)
+
+
+def _run_batch_chunk(seeds: Sequence[int], top_k: int) -> List[Tuple[int, Dict[str, List[str]], float]]:
+    """Group and score ``seeds``; return only the chunk's best ``top_k``."""
+    assert _batch_state is not None
+    students, teachers, desired, score = _batch_state
+    best: List[Tuple[float, int, int, Dict[str, List[str]]]] = []
+    for seed in seeds:
+        groups = _shuffle_and_slice(list(students), teachers, desired, seed)
+        value = score(groups)
+        entry = (value, -seed, seed, groups)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+    return [(seed, groups, value) for value, _, seed, groups in best]
+
+
+def iter_group_students_batch(
+    students: Sequence[str],
+    teachers: Sequence[str],
+    per_teacher: int,
+    seeds: Iterable[int],
+    score: Callable[[Dict[str, List[str]]], float],
+    per_teacher_counts: Dict[str, int] | None = None,
+    top_k: int = 10,
+    max_workers: int | None = None,
+    chunk_size: int = 256,
+) -> Iterator[Tuple[int, Dict[str, List[str]], float]]:
+    """Stream ``(seed, groups, score)`` candidates for many seeds.
+
+    Each seed produces exactly ``group_students(students, teachers, per_teacher,
+    seed, per_teacher_counts)``. Inputs and desired counts are prepared once and
+    shipped to each worker of a ``ProcessPoolExecutor``; every chunk of seeds is
+    scored in the worker and only its ``top_k`` candidates travel back, so
+    memory stays bounded however many seeds are swept. ``score`` must be
+    picklable (a module-level function) and higher means better. Results are
+    yielded as chunks complete, in no particular order.
+
+    ``max_workers=1`` runs in-process without a pool.
+    """
+    if top_k <= 0:
+        return
+    teachers_t = tuple(teachers)
+    desired = determine_desired_counts(teachers_t, per_teacher, per_teacher_counts)
+    shared = (tuple(students), teachers_t, desired, score)
+
+    def chunks() -> Iterator[List[int]]:
+        # Duplicates are dropped as seeds arrive, so an endless seed stream
+        # still yields its first results right away.
+        seen: Set[int] = set()
+        chunk: List[int] = []
+        for seed in seeds:
+            if seed in seen:
+                continue
+            seen.add(seed)
+            chunk.append(seed)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    workers = max_workers or os.cpu_count() or 1
+    if workers == 1:
+        global _batch_state
+        previous = _batch_state
+        _init_batch_worker(*shared)
+        try:
+            for chunk in chunks():
+                yield from _run_batch_chunk(chunk, top_k)
+        finally:
+            _batch_state = previous
+        return
+
+    # Imported here: the process-pool machinery is slow to import and only
+    # this path needs it, so plain grouping (e.g. grouper-cli) starts faster.
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=shared) as pool:
+        pending = set()
+        for chunk in chunks():
+            # Keep a small window in flight so finished results never pile up.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield from fut.result()
+            pending.add(pool.submit(_run_batch_chunk, chunk, top_k))
+        for fut in as_completed(pending):
+            yield from fut.result()
+
+
+def group_students_batch(
+    students: Sequence[str],
+    teachers: Sequence[str],
+    per_teacher: int,
+    seeds: Iterable[int],
+    score: Callable[[Dict[str, List[str]]], float],
+    per_teacher_counts: Dict[str, int] | None = None,
+    top_k: int = 10,
+    max_workers: int | None = None,
+    chunk_size: int = 256,
+) -> List[Tuple[int, Dict[str, List[str]], float]]:
+    """Return the ``top_k`` best ``(seed, groups, score)`` over ``seeds``.
+
+    Sorted by score (descending), ties broken by the smaller seed. See
+    :func:`iter_group_students_batch` for how the work is distributed.
+    """
+    best: List[Tuple[float, int, int, Dict[str, List[str]]]] = []
+    for seed, groups, value in iter_group_students_batch(
+        students, teachers, per_teacher, seeds, score, per_teacher_counts, top_k, max_workers, chunk_size
+    ):
+        entry = (value, -seed, seed, groups)
+        if len(best) < top_k:
+            heapq.heappush(best, entry)
+        elif entry[:2] > best[0][:2]:
+            heapq.heapreplace(best, entry)
+    best.sort(key=lambda e: e[:2], reverse=True)
+    return [(seed, groups, value) for value, _, seed, groups in best]
@@ -0,0 +1,135 @@
+"""Vectorised NumPy assignment engine.
+
+This engine is optional; the pure-Python :func:`grouper.logic.group_students`
+stays the default and the reference behaviour. Instead of copying and slicing
+name lists, it shuffles integer indices once and cuts that single array at
+the cumulative desired counts, so each group is a view into shared storage.
+
+Seed mapping (stable across releases):
+
+- ``shuffle="numpy"`` (default): the order is
+  ``numpy.random.default_rng(seed % 2**64).permutation(n)``.
+- ``shuffle="python"``: the order is ``list(range(n))`` shuffled by
+  ``random.Random(seed)``, i.e. exactly the permutation the pure-Python engine
+  applies, so the groups equal ``group_students(...)`` for the same seed.
+
+Group boundaries are identical for both: teachers are filled in order, each
+taking ``min(desired, remaining)`` students until the roster runs out.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from grouper.logic import determine_desired_counts
+
+SHUFFLES = ("numpy", "python")
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("缺少 numpy，请先安装：pip install numpy") from exc
+    return np
+
+
+@dataclass(frozen=True)
+class IndexGroups:
+    """Groups expressed as slices of one shuffled index array.
+
+    ``order[starts[i]:ends[i]]`` holds the student indices for ``teachers[i]``.
+    """
+
+    teachers: Tuple[str, ...]
+    order: Any
+    starts: Any
+    ends: Any
+
+    def __len__(self) -> int:
+        return len(self.teachers)
+
+    def view(self, position: int) -> Any:
+        """Return the index view for the teacher at ``position`` (no copy)."""
+        return self.order[self.starts[position] : self.ends[position]]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Yield ``(teacher, view)`` pairs in the order ``group_students`` fills them.
+
+        Like the pure-Python engine, filling stops once the roster is used up,
+        and a repeated teacher name is yielded again (the later slot wins).
+        """
+        total = self.assigned_count()
+        for i, teacher in enumerate(self.teachers):
+            if self.starts[i] >= total:
+                break
+            yield teacher, self.view(i)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Map teacher -> index view into ``order``."""
+        result = {teacher: self.order[:0] for teacher in self.teachers}
+        result.update(self.items())
+        return result
+
+    def assigned_count(self) -> int:
+        return int(self.ends[-1]) if len(self.ends) else 0
+
+    def materialize(self, students: Sequence[str]) -> Dict[str, List[str]]:
+        """Resolve indices back to names in the ``group_students`` shape."""
+        result: Dict[str, List[str]] = {teacher: [] for teacher in self.teachers}
+        for teacher, idx in self.items():
+            result[teacher] = [students[i] for i in idx.tolist()]
+        return result
+
+
+def shuffled_order(n: int, seed: int, shuffle: str = "numpy"):
+    """Return the shuffled index array for ``n`` students under ``seed``."""
+    np = _require_numpy()
+    if shuffle == "numpy":
+        return np.random.default_rng(int(seed) % 2**64).permutation(n)
+    if shuffle == "python":
+        order = list(range(n))
+        random.Random(seed).shuffle(order)
+        return np.asarray(order, dtype=np.int64)
+    raise ValueError(f"unknown shuffle {shuffle!r}; expected one of {SHUFFLES}")
+
+
+def group_indices(
+    n_students: int,
+    teachers: Sequence[str],
+    per_teacher: int,
+    seed: int,
+    per_teacher_counts: Dict[str, int] | None = None,
+    shuffle: str = "numpy",
+) -> IndexGroups:
+    """Assign ``n_students`` indices to ``teachers`` without building name lists."""
+    np = _require_numpy()
+    teachers_t = tuple(teachers)
+    desired = determine_desired_counts(teachers_t, per_teacher, per_teacher_counts)
+    wanted = np.fromiter(
+        (desired[t] for t in teachers_t), dtype=np.int64, count=len(teachers_t)
+    )
+    # Like ``group_students``, the cap counts each distinct teacher once.
+    total_take = min(n_students, sum(desired.values()))
+    ends = np.minimum(np.cumsum(wanted), total_take)
+    starts = np.empty_like(ends)
+    if len(ends):
+        starts[0] = 0
+        starts[1:] = ends[:-1]
+    order = shuffled_order(n_students, seed, shuffle)
+    return IndexGroups(teachers=teachers_t, order=order, starts=starts, ends=ends)
+
+
+def group_students_numpy(
+    students: Sequence[str],
+    teachers: Sequence[str],
+    per_teacher: int,
+    seed: int,
+    per_teacher_counts: Dict[str, int] | None = None,
+    shuffle: str = "numpy",
+) -> Dict[str, List[str]]:
+    """Drop-in counterpart of ``group_students`` backed by :func:`group_indices`."""
+    groups = group_indices(len(students), teachers, per_teacher, seed, per_teacher_counts, shuffle)
+    return groups.materialize(students)
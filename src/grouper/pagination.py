@@ -0,0 +1,82 @@
+"""Paged, searchable access to a stored grouping result.
+
+The web UI keeps large results out of the page and fetches rows on demand;
+a :class:`ResultView` holds one parsed result and answers those requests.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+SECTIONS = ("groups", "unassigned")
+
+# Filtered index lists kept per view, most recent searches first.
+_MAX_CACHED_QUERIES = 8
+
+
+def result_json(groups: Mapping[str, Sequence[str]], unassigned: Sequence[str]) -> bytes:
+    """Serialise a result in the layout :meth:`ResultView.from_json` reads."""
+    payload = {"groups": groups, "unassigned": list(unassigned)}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class ResultView:
+    groups: List[Tuple[str, List[str]]]
+    unassigned: List[str]
+    _matches: "OrderedDict[Tuple[str, str], List[int]]" = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "ResultView":
+        payload = json.loads(data)
+        return cls(list(payload.get("groups", {}).items()), list(payload.get("unassigned", [])))
+
+    def _matching(self, section: str, query: str) -> Optional[List[int]]:
+        """Indices of rows matching ``query``, or ``None`` for no filter."""
+        if not query:
+            return None
+        key = (section, query)
+        with self._lock:
+            hit = self._matches.get(key)
+            if hit is not None:
+                self._matches.move_to_end(key)
+                return hit
+        needle = query.casefold()
+        if section == "groups":
+            indices = [
+                i
+                for i, (teacher, students) in enumerate(self.groups)
+                if needle in teacher.casefold() or any(needle in s.casefold() for s in students)
+            ]
+        else:
+            indices = [i for i, name in enumerate(self.unassigned) if needle in name.casefold()]
+        with self._lock:
+            self._matches[key] = indices
+            while len(self._matches) > _MAX_CACHED_QUERIES:
+                self._matches.popitem(last=False)
+        return indices
+
+    def page(self, section: str = "groups", offset: int = 0, limit: int = 100, query: str = "") -> Dict:
+        """Return ``{"total", "offset", "rows"}`` for one window of ``section``.
+
+        Group rows are ``[teacher, [students...]]``; unassigned rows are
+        ``[name]``. ``total`` counts rows after filtering by ``query``.
+        """
+        if section not in SECTIONS:
+            raise ValueError(f"未知的结果分区：{section}")
+        source = self.groups if section == "groups" else self.unassigned
+        indices = self._matching(section, query.strip())
+        total = len(source) if indices is None else len(indices)
+        offset = max(0, min(offset, total))
+        end = min(total, offset + max(0, limit))
+        picked = range(offset, end) if indices is None else indices[offset:end]
+        if section == "groups":
+            rows = [[self.groups[i][0], self.groups[i][1]] for i in picked]
+        else:
+            rows = [[self.unassigned[i]] for i in picked]
+        return {"total": total, "offset": offset, "rows": rows}
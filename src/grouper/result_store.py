@@ -0,0 +1,154 @@
+"""Short-lived store for rendered export files, served by opaque token.
+
+Small results stay in memory; results of at least ``spill_threshold`` bytes
+are written to a private temporary directory so the process does not hold
+them. Both tiers are bounded by total bytes and age, and a spilled file is
+deleted as soon as its entry is evicted. A download that already opened a
+spilled file keeps reading it after eviction on POSIX systems.
+
+With ``shared=True`` every result is written to ``spill_dir`` itself, next
+to a small metadata file, so any process using the same directory can serve
+a token another one issued (multi-worker servers). Each process still evicts
+only the files it wrote; whoever owns the directory removes it at shutdown.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import time
+import shutil
+import tempfile
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+from grouper.cache import LRUCache
+
+_TOKEN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+@dataclass(frozen=True)
+class StoredResult:
+    """One stored export; exactly one of ``data`` and ``path`` is set."""
+
+    filename: str
+    mimetype: str
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[Path] = None
+
+    def open(self) -> BinaryIO:
+        """Return a readable binary stream of the content."""
+        if self.data is not None:
+            return BytesIO(self.data)
+        return open(self.path, "rb")  # type: ignore[arg-type]
+
+
+class ResultStore:
+    """Token-addressed export files held in memory or spilled to a temp dir."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: Optional[float] = None,
+        spill_threshold: Optional[int] = None,
+        max_spill_bytes: int = 0,
+        spill_dir: Optional[Path] = None,
+        max_entries: int = 1024,
+        shared: bool = False,
+    ) -> None:
+        if shared and not spill_dir:
+            raise ValueError("shared=True requires spill_dir")
+        self.shared = shared
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.spill_threshold = spill_threshold if spill_threshold and spill_threshold > 0 else None
+        self._spill_root = Path(spill_dir) if spill_dir else None
+        self._spill_path: Optional[Path] = None
+        self._memory = LRUCache(max_entries, ttl=ttl, max_bytes=max_bytes, sizeof=lambda r: r.size)
+        self._disk = LRUCache(
+            max_entries if max_spill_bytes > 0 else 0,
+            ttl=ttl,
+            max_bytes=max_spill_bytes,
+            sizeof=lambda r: r.size,
+            on_evict=lambda _token, result: self._unlink(result),
+        )
+
+    @staticmethod
+    def _unlink(result: StoredResult) -> None:
+        if result.path is not None:
+            for path in (result.path, result.path.with_suffix(".json")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _spill_directory(self) -> Path:
+        if self._spill_path is None and self.shared:
+            self._spill_root.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
+            self._spill_path = self._spill_root
+        elif self._spill_path is None:
+            if self._spill_root is not None:
+                self._spill_root.mkdir(parents=True, exist_ok=True)
+            self._spill_path = Path(tempfile.mkdtemp(prefix="grouper-results-", dir=self._spill_root))
+        return self._spill_path
+
+    def put(self, data: bytes, filename: str, mimetype: str) -> Optional[str]:
+        """Store ``data`` and return its token, or ``None`` if it does not fit."""
+        token = secrets.token_urlsafe(16)
+        self._memory.prune()
+        self._disk.prune()
+        if not self.shared and (self.spill_threshold is None or len(data) < self.spill_threshold):
+            if self._memory.put(token, StoredResult(filename, mimetype, len(data), data=data)):
+                return token
+        if self._disk.max_entries == 0 or len(data) > (self._disk.max_bytes or 0):
+            return None
+
+        path = self._spill_directory() / token
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        if self.shared:
+            # Written after the data, so a reader that finds it finds the data too.
+            meta = json.dumps({"filename": filename, "mimetype": mimetype, "size": len(data)})
+            path.with_suffix(".json").write_text(meta, encoding="utf-8")
+        result = StoredResult(filename, mimetype, len(data), path=path)
+        if not self._disk.put(token, result):
+            self._unlink(result)
+            return None
+        return token
+
+    def get(self, token: str) -> Optional[StoredResult]:
+        result = self._memory.get(token)
+        if result is None:
+            result = self._disk.get(token)
+        if result is None and self.shared:
+            result = self._get_shared(token)
+        return result
+
+    def _get_shared(self, token: str) -> Optional[StoredResult]:
+        """Look up a token issued by another process sharing the directory."""
+        if not _TOKEN.fullmatch(token):
+            return None
+        path = self._spill_directory() / token
+        try:
+            meta_path = path.with_suffix(".json")
+            if self.ttl is not None and time.time() - meta_path.stat().st_mtime > self.ttl:
+                return None
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return StoredResult(meta["filename"], meta["mimetype"], int(meta["size"]), path=path)
+
+    def clear(self) -> None:
+        self._memory.clear()
+        self._disk.clear()
+        if self._spill_path is not None and not self.shared:
+            shutil.rmtree(self._spill_path, ignore_errors=True)
+            self._spill_path = None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"memory": self._memory.stats(), "spill": self._disk.stats()}
@@ -0,0 +1,180 @@
+"""Incrementally maintained roster parse for editors.
+
+A :class:`RosterLines` keeps the parsed entries of every line plus a
+multiset of names, so an edit only re-parses the lines it touched. Because a
+newline always ends a row, the concatenated per-line entries equal the entries
+of the whole text, and :meth:`RosterLines.names` /
+:meth:`RosterLines.teachers_with_counts` return exactly what
+:func:`grouper.logic.parse_names_block` /
+:func:`grouper.logic.parse_teachers_with_counts` return for that text.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from grouper.logic import determine_desired_counts, iter_entries, parse_teacher_entry
+
+
+def _names(lines: Sequence[tuple], teachers: bool) -> List[str]:
+    seen = set()
+    names: List[str] = []
+    for parsed in lines:
+        for entry in parsed:
+            name = entry[0] if teachers else entry
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+    return names
+
+
+def _teachers_with_counts(lines: Sequence[tuple]) -> Tuple[List[str], Dict[str, int]]:
+    seen = set()
+    teachers: List[str] = []
+    counts: Dict[str, int] = {}
+    for parsed in lines:
+        for name, num in parsed:
+            if name in seen:
+                continue
+            seen.add(name)
+            teachers.append(name)
+            if num:
+                counts[name] = int(num)
+    return teachers, counts
+
+
+@dataclass(frozen=True)
+class RosterSnapshot:
+    """Immutable copy of a :class:`RosterLines` table, safe to read off-thread."""
+
+    teachers: bool
+    lines: Tuple[tuple, ...]
+    entry_count: int
+
+    def names(self) -> List[str]:
+        return _names(self.lines, self.teachers)
+
+    def teachers_with_counts(self) -> Tuple[List[str], Dict[str, int]]:
+        return _teachers_with_counts(self.lines)
+
+
+class RosterLines:
+    """Parsed line table of a student (``teachers=False``) or teacher roster."""
+
+    def __init__(self, text: Union[str, Iterable[str]] = "", teachers: bool = False) -> None:
+        self.teachers = teachers
+        self._lines: List[tuple] = []
+        self._occurrences: Counter = Counter()
+        self._entries = 0
+        self.reset(text)
+
+    def _parse_line(self, line: str) -> tuple:
+        if not self.teachers:
+            return tuple(iter_entries(line))
+        parsed = []
+        for entry in iter_entries(line):
+            name, num, _fmt = parse_teacher_entry(entry)
+            if name:
+                parsed.append((name, num))
+        return tuple(parsed)
+
+    def _name(self, entry) -> str:
+        return entry[0] if self.teachers else entry
+
+    def reset(self, text: Union[str, Iterable[str]]) -> None:
+        """Re-parse from scratch.
+
+        ``text`` is a string, or an iterable of ``\\n``-free lines (e.g. an
+        editor's blocks), which is consumed one line at a time.
+        """
+        self._lines = []
+        self._occurrences = Counter()
+        self._entries = 0
+        self.replace_lines(0, 0, text.split("\n") if isinstance(text, str) else text)
+
+    def replace_lines(self, start: int, removed: int, new_lines: Iterable[str]) -> None:
+        """Replace ``removed`` lines from ``start`` with ``new_lines`` (``\\n``-free)."""
+        occurrences = self._occurrences
+        for parsed in self._lines[start : start + removed]:
+            self._entries -= len(parsed)
+            for entry in parsed:
+                name = self._name(entry)
+                if occurrences[name] <= 1:
+                    del occurrences[name]
+                else:
+                    occurrences[name] -= 1
+        fresh = [self._parse_line(line) for line in new_lines]
+        for parsed in fresh:
+            self._entries += len(parsed)
+            occurrences.update(self._name(e) for e in parsed)
+        self._lines[start : start + removed] = fresh
+
+    @property
+    def line_count(self) -> int:
+        return len(self._lines)
+
+    @property
+    def entry_count(self) -> int:
+        """Number of non-empty entries, duplicates included."""
+        return self._entries
+
+    @property
+    def unique_count(self) -> int:
+        return len(self._occurrences)
+
+    @property
+    def duplicate_count(self) -> int:
+        """Entries dropped by de-duplication."""
+        return self._entries - len(self._occurrences)
+
+    def names(self) -> List[str]:
+        """De-duplicated names in first-seen order."""
+        return _names(self._lines, self.teachers)
+
+    def teachers_with_counts(self) -> Tuple[List[str], Dict[str, int]]:
+        """``(teachers, counts)`` as :func:`parse_teachers_with_counts` returns them."""
+        return _teachers_with_counts(self._lines)
+
+    def snapshot(self) -> RosterSnapshot:
+        """Copy the line table (parsed entries are shared, never re-parsed)."""
+        return RosterSnapshot(self.teachers, tuple(self._lines), self._entries)
+
+
+@dataclass
+class RosterSummary:
+    """What the grouping run would see for the current inputs."""
+
+    students_available: int = 0
+    student_duplicates: int = 0
+    teacher_duplicates: int = 0
+    total_needed: int = 0
+    desired: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def balanced(self) -> bool:
+        return bool(self.desired) and self.total_needed == self.students_available
+
+
+def summarize(
+    students: RosterSnapshot,
+    teachers: RosterSnapshot,
+    per_teacher: int,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Optional[RosterSummary]:
+    """Compute a :class:`RosterSummary`; return ``None`` once ``should_stop()`` is true."""
+    names = students.names()
+    if should_stop is not None and should_stop():
+        return None
+    teacher_names, counts = teachers.teachers_with_counts()
+    if should_stop is not None and should_stop():
+        return None
+    desired = determine_desired_counts(teacher_names, per_teacher, counts)
+    return RosterSummary(
+        students_available=len(names),
+        student_duplicates=students.entry_count - len(names),
+        teacher_duplicates=teachers.entry_count - len(teacher_names),
+        total_needed=sum(desired.values()),
+        desired=desired,
+    )
@@ -0,0 +1,290 @@
+"""Constraint-aware assignment: capacities, exclusions and pinning.
+
+``solve_assignment`` extends the shuffle-then-slice model of
+:func:`grouper.logic.group_students` with per-teacher minimum/maximum counts,
+"student must not go to teacher" exclusions and "student pinned to teacher"
+rules. It solves a capacitated bipartite matching (a b-matching, i.e. a
+unit-capacity max-flow) in two phases:
+
+1. fill every teacher up to its minimum;
+2. raise capacities to the maxima and place the remaining students.
+
+Each phase places students greedily in seeded-random order and falls back to
+an augmenting-path search only when a student's open teachers are all
+excluded. The bipartite graph is never materialised: a student's neighbours
+are "every teacher except its exclusions", so sparse exclusion lists keep the
+search close to linear. Augmenting paths never lower a teacher's load, so the
+minima reached in phase 1 survive phase 2, and the result is a maximum
+matching within the maxima.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from grouper.logic import determine_desired_counts
+
+# How many random probes to try before scanning the open-teacher list.
+_RANDOM_PROBES = 8
+_NO_TEACHERS: Set[int] = frozenset()  # type: ignore[assignment]
+
+
+class InfeasibleAssignment(ValueError):
+    """Raised when the constraints admit no assignment.
+
+    ``teachers`` are the teachers that cannot be satisfied. ``required`` and
+    ``available`` certify it: for pins they are the pinned count and the
+    capacity it exceeds; for minima, ``required`` is the summed minimum of a
+    teacher set containing ``teachers`` and ``available`` the number of
+    students allowed to join any of them, which falls short.
+    """
+
+    def __init__(self, message: str, teachers: Sequence[str], required: int, available: int) -> None:
+        super().__init__(message)
+        self.teachers = list(teachers)
+        self.required = required
+        self.available = available
+
+
+class _OpenTeachers:
+    """Teachers with spare capacity, supporting O(1) random pick and removal."""
+
+    def __init__(self, members: Iterable[int]) -> None:
+        self.items: List[int] = list(members)
+        self.pos: Dict[int, int] = {t: i for i, t in enumerate(self.items)}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def discard(self, t: int) -> None:
+        i = self.pos.pop(t, None)
+        if i is None:
+            return
+        last = self.items.pop()
+        if last != t:
+            self.items[i] = last
+            self.pos[last] = i
+
+    def pick(self, rng: random.Random, banned: Set[int]) -> int | None:
+        items = self.items
+        if not items:
+            return None
+        if not banned:
+            return items[rng.randrange(len(items))]
+        for _ in range(_RANDOM_PROBES):
+            t = items[rng.randrange(len(items))]
+            if t not in banned:
+                return t
+        for t in items:
+            if t not in banned:
+                return t
+        return None
+
+
+def solve_assignment(
+    students: Sequence[str],
+    teachers: Sequence[str],
+    seed: int,
+    per_teacher: int,
+    per_teacher_counts: Dict[str, int] | None = None,
+    min_counts: Mapping[str, int] | None = None,
+    exclusions: Iterable[Tuple[str, str]] = (),
+    pins: Mapping[str, str] | None = None,
+) -> Dict[str, List[str]]:
+    """Return a seeded-random assignment honouring all constraints.
+
+    - Maximum counts follow ``group_students``: ``per_teacher`` unless
+      ``per_teacher_counts`` overrides it. ``min_counts`` defaults to 0.
+    - ``exclusions`` holds ``(student, teacher)`` pairs that must not be matched.
+    - ``pins`` maps a student to the teacher it must be assigned to.
+    - As many students as the maxima allow are assigned; the rest stay
+      unassigned, exactly as in ``group_students``.
+
+    Raises :class:`InfeasibleAssignment` with a diagnostic teacher set when the
+    minima or pins cannot be satisfied, and ``ValueError`` for malformed input.
+    """
+    rng = random.Random(seed)
+    names = list(dict.fromkeys(students))
+    teacher_list = list(dict.fromkeys(teachers))
+    s_index = {s: i for i, s in enumerate(names)}
+    t_index = {t: i for i, t in enumerate(teacher_list)}
+
+    maxima = determine_desired_counts(teacher_list, per_teacher, per_teacher_counts)
+    cap_max = [maxima[t] for t in teacher_list]
+    cap_min = [0] * len(teacher_list)
+    for t, n in (min_counts or {}).items():
+        if t not in t_index:
+            raise ValueError(f"未知老师：{t}")
+        ti = t_index[t]
+        cap_min[ti] = max(0, int(n))
+        if cap_min[ti] > cap_max[ti]:
+            raise ValueError(f"老师 {t} 的最少人数 {cap_min[ti]} 大于最多人数 {cap_max[ti]}。")
+
+    banned: Dict[int, Set[int]] = defaultdict(set)
+    for s, t in exclusions:
+        if s in s_index and t in t_index:
+            banned[s_index[s]].add(t_index[t])
+
+    load = [0] * len(teacher_list)
+    members: List[Set[int]] = [set() for _ in teacher_list]
+    where: Dict[int, int] = {}
+    pinned: Set[int] = set()
+    for s, t in (pins or {}).items():
+        if s not in s_index:
+            continue
+        if t not in t_index:
+            raise ValueError(f"学生 {s} 被指定给未知老师：{t}")
+        si, ti = s_index[s], t_index[t]
+        if ti in banned.get(si, ()):
+            raise InfeasibleAssignment(f"学生 {s} 被指定给老师 {t}，但该组合已被排除。", [t], 1, 0)
+        pinned.add(si)
+        where[si] = ti
+        members[ti].add(si)
+        load[ti] += 1
+    for ti, n in enumerate(load):
+        if n > cap_max[ti]:
+            t = teacher_list[ti]
+            raise InfeasibleAssignment(
+                f"老师 {t} 被指定了 {n} 名学生，超过其上限 {cap_max[ti]} 人。", [t], n, cap_max[ti]
+            )
+
+    order = [i for i in range(len(names)) if i not in pinned]
+    rng.shuffle(order)
+    rank = {s: r for r, s in enumerate(order)}
+
+    def move(s: int, ti: int) -> None:
+        old = where.get(s)
+        if old is not None:
+            members[old].discard(s)
+            load[old] -= 1
+        where[s] = ti
+        members[ti].add(s)
+        load[ti] += 1
+
+    def fill(caps: List[int]) -> None:
+        open_t = _OpenTeachers(ti for ti in range(len(caps)) if load[ti] < caps[ti])
+        dead_t: Set[int] = set()
+
+        def place(s: int, ti: int) -> None:
+            move(s, ti)
+            if load[ti] >= caps[ti]:
+                open_t.discard(ti)
+
+        def augment(root: int) -> bool:
+            # BFS over "student u may take the seat of student v in teacher t";
+            # each newly reached student is checked for an open seat at once.
+            via: Dict[int, Tuple[int, int]] = {}
+            seen_s: Set[int] = {root}
+            unseen = [ti for ti in range(len(caps)) if ti not in dead_t and load[ti] > 0]
+            expanded: List[int] = []
+            queue = [root]
+            for u in queue:
+                ex = banned.get(u, _NO_TEACHERS)
+                keep: List[int] = []
+                for ti in unseen:
+                    if ti in ex:
+                        keep.append(ti)
+                        continue
+                    expanded.append(ti)
+                    for v in members[ti]:
+                        if v in seen_s or v in pinned:
+                            continue
+                        seen_s.add(v)
+                        via[v] = (ti, u)
+                        target = open_t.pick(rng, banned.get(v, _NO_TEACHERS))
+                        if target is None:
+                            queue.append(v)
+                            continue
+                        cur: int | None = v
+                        while cur is not None:
+                            nxt_target, nxt = via.get(cur, (target, None))
+                            place(cur, target)
+                            target, cur = nxt_target, nxt
+                        return True
+                unseen = keep
+            # Nothing this search reached can lead to an open seat until the
+            # matching changes, so later searches skip those teachers.
+            dead_t.update(expanded)
+            return False
+
+        for s in order:
+            if not len(open_t):
+                break
+            if s in where:
+                continue
+            target = open_t.pick(rng, banned.get(s, _NO_TEACHERS))
+            if target is not None:
+                place(s, target)
+            elif augment(s):
+                dead_t.clear()
+
+    fill(cap_min)
+    if any(load[ti] < need for ti, need in enumerate(cap_min)):
+        _raise_unmet_minimum(load, names, teacher_list, cap_min, banned, pinned, where)
+    fill(cap_max)
+
+    result: Dict[str, List[str]] = {}
+    for ti, t in enumerate(teacher_list):
+        group = sorted(members[ti], key=lambda s: rank.get(s, -1))
+        result[t] = [names[s] for s in group]
+    return result
+
+
+def _raise_unmet_minimum(
+    load: Sequence[int],
+    names: Sequence[str],
+    teacher_list: Sequence[str],
+    cap_min: Sequence[int],
+    banned: Mapping[int, Set[int]],
+    pinned: Set[int],
+    where: Mapping[int, int],
+) -> None:
+    """Raise for the teachers left below their minimum after phase 1.
+
+    The certificate is the source side of the final cut: starting from those
+    teachers, follow "a student allowed here is currently held by teacher t'"
+    links. No augmenting path exists, so every student who could join the
+    closure ``T`` is already inside it and ``sum(min(T)) > |N(T)|``. Each
+    student is visited once; afterwards a teacher only rescans the students
+    that the previous teacher excluded.
+    """
+    unmet = [ti for ti, need in enumerate(cap_min) if load[ti] < need]
+    banned_at: Dict[int, Set[int]] = defaultdict(set)
+    for s, ex in banned.items():
+        for ti in ex:
+            banned_at[ti].add(s)
+    pinned_at: Dict[int, int] = defaultdict(int)
+    for s in pinned:
+        pinned_at[where[s]] += 1
+
+    closure = list(unmet)
+    in_closure = set(unmet)
+    free = set(range(len(names))) - pinned
+    supply = 0
+    for ti in closure:
+        supply += pinned_at.get(ti, 0)
+        ex = banned_at.get(ti)
+        if ex:
+            reachable = free - ex
+            free &= ex
+        else:
+            reachable, free = free, set()
+        supply += len(reachable)
+        for s in reachable:
+            held = where.get(s)
+            if held is not None and held not in in_closure:
+                in_closure.add(held)
+                closure.append(held)
+
+    required = sum(cap_min[ti] for ti in closure)
+    failing = [teacher_list[ti] for ti in unmet]
+    shown = ", ".join(failing[:10]) + (f" 等 {len(failing)} 位老师" if len(failing) > 10 else "")
+    raise InfeasibleAssignment(
+        f"无法满足老师最少人数：{shown} 未达到最少人数"
+        f"（相关老师共需 {required} 人，但可分配的学生只有 {supply} 人）。",
+        failing,
+        required,
+        supply,
+    )
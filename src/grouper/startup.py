@@ -0,0 +1,95 @@
+"""Start-up helpers for the desktop app: phase timing and the splash cache.
+
+``grouper --profile-startup`` records how long each start-up phase takes and
+writes the breakdown to stderr and ``startup-profile.txt`` next to the
+settings file (windowed builds have no console). Nothing here imports Qt.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from grouper.config import CACHE_DIR, X86_64_DIR
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_FILE = X86_64_DIR / "startup-profile.txt"
+
+
+class StartupProfile:
+    """Collects phase durations and milestones, relative to ``origin``.
+
+    Timing is always recorded (it costs a few ``perf_counter`` calls);
+    :meth:`emit` only writes when the profile is ``enabled``.
+    """
+
+    def __init__(self, enabled: bool = False, origin: Optional[float] = None) -> None:
+        self.enabled = enabled
+        self.origin = time.perf_counter() if origin is None else origin
+        self._phases: List[Tuple[str, float]] = []
+        self._marks: List[Tuple[str, float]] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((name, time.perf_counter() - start))
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a phase timed elsewhere, e.g. on a worker thread."""
+        self._phases.append((name, seconds))
+
+    def mark(self, name: str) -> None:
+        """Record a milestone as the time elapsed since ``origin``."""
+        self._marks.append((name, time.perf_counter() - self.origin))
+
+    def report(self) -> str:
+        width = max((len(name) for name, _ in self._phases + self._marks), default=0) + 2
+        lines = ["Grouper 启动耗时（毫秒）", "阶段："]
+        lines += [f"  {name:<{width}}{seconds * 1000:>9.1f}" for name, seconds in self._phases]
+        lines.append("里程碑（自启动起）：")
+        lines += [f"  {name:<{width}}{seconds * 1000:>9.1f}" for name, seconds in self._marks]
+        return "\n".join(lines) + "\n"
+
+    def emit(self, path: Path = PROFILE_FILE) -> None:
+        if not self.enabled:
+            return
+        text = self.report()
+        if sys.stderr is not None:
+            sys.stderr.write(text)
+            sys.stderr.flush()
+        try:
+            path.write_text(text, encoding="utf-8")
+        except OSError:
+            pass
+
+
+def splash_cache_path(source: Path, width: int, height: int) -> Optional[Path]:
+    """Return where the pre-scaled copy of ``source`` is cached.
+
+    The name carries the source size and a hash of its bytes, not its mtime:
+    a onefile build re-extracts the assets with fresh mtimes on every launch.
+    Returns ``None`` if ``source`` is unreadable.
+    """
+    try:
+        data = source.read_bytes()
+    except OSError:
+        return None
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    return CACHE_DIR / f"{source.stem}-{width}x{height}-{len(data)}-{digest}.jpg"
+
+
+def prune_splash_cache(source: Path, keep: Path) -> None:
+    """Delete stale cached copies of ``source``, keeping ``keep``."""
+    try:
+        for path in CACHE_DIR.glob(f"{source.stem}-*x*-*.jpg"):
+            if path != keep:
+                path.unlink(missing_ok=True)
+    except OSError:
+        pass
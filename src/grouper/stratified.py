@@ -0,0 +1,164 @@
+"""Stratified grouping: balance groups by student attributes in one pass.
+
+Students are bucketed by the tuple of their attribute values (the stratum),
+each stratum is shuffled with the seed, and strata are laid end to end in
+sorted key order. Every teacher then receives slots spaced evenly along that
+sequence, so any contiguous stratum is shared out in proportion to the
+teachers' counts (each teacher's share of each stratum is within one student
+of proportional). Sorting by key keeps the first attribute's values
+contiguous as well, so that column is balanced to the same bound.
+
+Counts and shortfall follow :func:`grouper.logic.group_students`: teachers are
+served in order with ``min(desired, remaining)``, and students beyond the
+total stay unassigned (drawn proportionally from every stratum).
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Mapping, Sequence, Tuple
+
+from grouper.logic import determine_desired_counts
+
+
+@dataclass
+class BalanceReport:
+    """Per-teacher attribute counts and how far they stray from proportional.
+
+    ``counts[teacher][column][value]`` is the number of that teacher's
+    students with ``value`` in ``column``. ``max_deviation[column]`` is the
+    largest ``|observed - expected|`` over teachers and values, where
+    ``expected`` is the teacher's group size times the value's share among
+    assigned students.
+    """
+
+    counts: Dict[str, Dict[str, Dict[Hashable, int]]] = field(default_factory=dict)
+    max_deviation: Dict[str, float] = field(default_factory=dict)
+
+
+def _spread_slots(counts: Sequence[int], total: int, rng: random.Random) -> List[int]:
+    """Return ``total`` labels where label ``i`` appears ``counts[i]`` times, evenly spaced.
+
+    Positions are bucketed rather than sorted, keeping this O(total). Most
+    positions hold one label; collisions spill into a side table.
+    """
+    owner = [-1] * total
+    spill: Dict[int, List[int]] = {}
+    for label, c in enumerate(counts):
+        if c <= 0:
+            continue
+        step = total / c
+        offset = rng.random()
+        for k in range(c):
+            # Rounding can push the last position of an offset near 1 onto ``total``.
+            pos = min(int((k + offset) * step), total - 1)
+            if owner[pos] < 0:
+                owner[pos] = label
+            else:
+                spill.setdefault(pos, []).append(label)
+    if not spill:
+        return owner
+    slots: List[int] = []
+    for pos, label in enumerate(owner):
+        if label >= 0:
+            slots.append(label)
+        extra = spill.get(pos)
+        if extra:
+            slots.extend(extra)
+    return slots
+
+
+def balance_report(
+    groups: Mapping[str, Sequence[str]],
+    profiles: Mapping[str, Sequence[Hashable]],
+    columns: Sequence[str],
+) -> BalanceReport:
+    """Compute a :class:`BalanceReport` for ``groups``.
+
+    ``profiles`` maps each student to its attribute values in ``columns`` order.
+    """
+    report = BalanceReport()
+    totals: List[Dict[Hashable, int]] = [{} for _ in columns]
+    assigned = 0
+    for teacher, members in groups.items():
+        per_col: Dict[str, Dict[Hashable, int]] = {c: {} for c in columns}
+        for name in members:
+            values = profiles[name]
+            for ci, col in enumerate(columns):
+                v = values[ci]
+                per_col[col][v] = per_col[col].get(v, 0) + 1
+                totals[ci][v] = totals[ci].get(v, 0) + 1
+        assigned += len(members)
+        report.counts[teacher] = per_col
+    for ci, col in enumerate(columns):
+        worst = 0.0
+        for teacher, members in groups.items():
+            observed = report.counts[teacher][col]
+            for v, total in totals[ci].items():
+                expected = len(members) * total / assigned if assigned else 0.0
+                worst = max(worst, abs(observed.get(v, 0) - expected))
+        report.max_deviation[col] = worst
+    return report
+
+
+def group_students_stratified(
+    students: Sequence[str],
+    teachers: Sequence[str],
+    per_teacher: int,
+    seed: int,
+    attributes: Mapping[str, Sequence[Hashable]],
+    per_teacher_counts: Dict[str, int] | None = None,
+) -> Tuple[Dict[str, List[str]], BalanceReport]:
+    """Assign students so every group mirrors the roster's attribute mix.
+
+    ``attributes`` maps a column name (e.g. ``"gender"``, ``"class"``) to
+    values aligned with ``students``, whose names must be unique. Returns
+    ``(groups, report)`` where ``groups`` has the ``group_students`` shape.
+    """
+    columns = list(attributes)
+    for col in columns:
+        if len(attributes[col]) != len(students):
+            raise ValueError(f"属性列 {col} 的长度与学生人数不一致。")
+
+    rng = random.Random(seed)
+    teachers_list = list(teachers)
+    desired = determine_desired_counts(teachers_list, per_teacher, per_teacher_counts)
+
+    profiles: Dict[str, Tuple[Hashable, ...]] = {}
+    strata: Dict[Tuple[Hashable, ...], List[str]] = {}
+    keys = zip(*(attributes[col] for col in columns)) if columns else (() for _ in students)
+    for name, key in zip(students, keys):
+        if name in profiles:
+            # Groups and the report are keyed by name, so a repeat would lose a row.
+            raise ValueError(f"学生名单中有重复姓名：{name}，请先去重。")
+        profiles[name] = key
+        strata.setdefault(key, []).append(name)
+
+    ordered: List[str] = []
+    for key in sorted(strata, key=lambda k: tuple(str(v) for v in k)):
+        bucket = strata[key]
+        rng.shuffle(bucket)
+        ordered.extend(bucket)
+
+    # Serve teachers in order exactly like ``group_students``.
+    result: Dict[str, List[str]] = {t: [] for t in teachers_list}
+    total_take = min(len(ordered), sum(desired.values()))
+    takes: List[int] = []
+    remaining = total_take
+    for t in teachers_list:
+        take = min(desired.get(t, 0), remaining)
+        takes.append(take)
+        remaining -= take
+    # The extra label collects unassigned students, spread across strata too.
+    takes.append(len(ordered) - total_take)
+
+    slots = _spread_slots(takes, len(ordered), rng)
+    buckets: List[List[str]] = [[] for _ in takes]
+    for name, label in zip(ordered, slots):
+        buckets[label].append(name)
+    for t, members in zip(teachers_list, buckets):
+        if members:
+            result[t] = members
+
+    return result, balance_report(result, profiles, columns)
@@ -25,7 +25,7 @@ def load_styles() -> str:
             border-radius: 12px;
             border: 1px solid rgba(255,255,255,0.35);
         }
-        QLineEdit, QTextEdit, QSpinBox {
+        QLineEdit, QTextEdit, QPlainTextEdit, QSpinBox {
             background: rgba(255,255,255,0.85);
             border: 1px solid #d0d7de;
             border-radius: 6px;
@@ -0,0 +1,249 @@
+"""Streaming readers for uploaded roster files.
+
+The web form accepts ``.txt``, ``.csv`` and ``.xlsx`` rosters. :func:`iter_upload`
+turns one into newline-terminated text chunks that :func:`grouper.logic.iter_names`
+and :func:`grouper.logic.parse_teachers_with_counts` consume directly, so an
+upload is parsed while it is read and never held as a single string.
+:func:`iter_roster_file` does the same for a local file, memory-mapping plain
+text instead of reading it.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import mmap
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence, Tuple
+
+UPLOAD_EXTENSIONS = (".txt", ".csv", ".xlsx")
+
+# First-row cells treated as a header when no column is named explicitly.
+HEADER_LABELS = frozenset(
+    {
+        "姓名",
+        "名字",
+        "名单",
+        "学生",
+        "学生姓名",
+        "老师",
+        "教师",
+        "导师",
+        "老师姓名",
+        "教师姓名",
+        "name",
+        "names",
+        "student",
+        "students",
+        "teacher",
+        "teachers",
+    }
+)
+
+_TEXT_CHUNK_SIZE = 64 * 1024
+_ROWS_PER_CHUNK = 1024
+_SNIFF_BYTES = 64 * 1024
+
+
+def sniff_encoding(head: bytes) -> str:
+    """Guess UTF-8 vs GB18030 from the first bytes of a file.
+
+    Spreadsheet tools on Chinese Windows save CSV/TXT as GBK by default.
+    """
+    try:
+        # Incremental decode tolerates a character cut off at the sniff boundary.
+        codecs.getincrementaldecoder("utf-8")().decode(head[:_SNIFF_BYTES], final=False)
+    except UnicodeDecodeError:
+        return "gb18030"
+    return "utf-8-sig"
+
+
+def _encoding(stream: BinaryIO) -> str:
+    """:func:`sniff_encoding` for a seekable stream; others are assumed to be UTF-8."""
+    try:
+        if not stream.seekable():
+            return "utf-8-sig"
+        head = stream.read(_SNIFF_BYTES)
+        stream.seek(0)
+    except (AttributeError, OSError):
+        return "utf-8-sig"
+    return sniff_encoding(head)
+
+
+def _text(stream: BinaryIO) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding=_encoding(stream), errors="replace", newline="")
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _column_index(spec: str) -> Optional[int]:
+    """Parse a 1-based column number or spreadsheet letters (``A``, ``AB``)."""
+    if spec.isdecimal():
+        return int(spec) - 1 if int(spec) >= 1 else None
+    if spec.isascii() and spec.isalpha() and len(spec) <= 3:
+        index = 0
+        for ch in spec.upper():
+            index = index * 26 + (ord(ch) - ord("A") + 1)
+        return index - 1
+    return None
+
+
+def _resolve(spec: str, header: Sequence[str]) -> Tuple[int, bool]:
+    """Return ``(column index, first row is a header)`` for a column ``spec``.
+
+    ``spec`` is a header label, a 1-based column number or spreadsheet
+    letters; a header label wins when it matches. With no ``spec`` the first
+    column is used.
+    """
+    labels = [cell.casefold() for cell in header]
+    spec = spec.strip()
+    if spec and spec.casefold() in labels:
+        return labels.index(spec.casefold()), True
+    if not spec:
+        index = 0
+    else:
+        index = _column_index(spec)
+        if index is None or index >= len(labels):
+            raise ValueError(f"找不到名称列：{spec}")
+    looks_like_header = index < len(labels) and labels[index] in HEADER_LABELS
+    return index, looks_like_header
+
+
+def _table_chunks(rows: Iterator[Sequence], column: str, count_column: str) -> Iterator[str]:
+    """Yield the chosen column of ``rows`` as text chunks, one entry per line.
+
+    With ``count_column`` each entry is written as ``name:count`` so teacher
+    counts go through the same parser as typed input.
+    """
+    first = next(rows, None)
+    if first is None:
+        return
+    header = [_cell_text(cell) for cell in first]
+    index, has_header = _resolve(column, header)
+    count_index = None
+    if count_column.strip():
+        count_index, count_header = _resolve(count_column, header)
+        has_header = has_header or count_header
+    if not has_header:
+        rows = _prepend(first, rows)
+
+    batch = []
+    for row in rows:
+        if index >= len(row):
+            continue
+        name = _cell_text(row[index])
+        if not name:
+            continue
+        if count_index is not None and count_index < len(row):
+            count = _cell_text(row[count_index])
+            if count:
+                name = f"{name}:{count}"
+        batch.append(name)
+        if len(batch) >= _ROWS_PER_CHUNK:
+            yield "\n".join(batch) + "\n"
+            batch.clear()
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def _prepend(first: Sequence, rows: Iterable[Sequence]) -> Iterator[Sequence]:
+    yield first
+    yield from rows
+
+
+def _iter_txt(stream: BinaryIO) -> Iterator[str]:
+    text = _text(stream)
+    try:
+        yield from iter(lambda: text.read(_TEXT_CHUNK_SIZE), "")
+    finally:
+        text.detach()  # leave the caller's stream open
+
+
+def _iter_csv(stream: BinaryIO, column: str, count_column: str) -> Iterator[str]:
+    text = _text(stream)
+    try:
+        yield from _table_chunks(csv.reader(text), column, count_column)
+    except csv.Error as exc:
+        raise ValueError(f"无法读取 CSV 文件：{exc}") from exc
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(stream: BinaryIO, column: str, count_column: str) -> Iterator[str]:
+    try:
+        from openpyxl import load_workbook
+    except Exception as exc:  # pragma: no cover - runtime dependency import guard
+        raise RuntimeError("缺少 openpyxl，请先安装：pip install openpyxl") from exc
+    try:
+        # Read-only mode streams rows from the sheet XML instead of building cells.
+        wb = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ValueError("无法读取 Excel 文件，请确认是 .xlsx 格式。") from exc
+    try:
+        yield from _table_chunks(wb.active.iter_rows(values_only=True), column, count_column)
+    finally:
+        wb.close()
+
+
+def iter_upload(stream: BinaryIO, filename: str, column: str = "", count_column: str = "") -> Iterator[str]:
+    """Yield text chunks for the roster in ``stream``, chosen by ``filename``'s extension.
+
+    ``.txt`` files are decoded as-is; for ``.csv`` and ``.xlsx`` (first sheet)
+    only ``column`` is read, plus ``count_column`` when given. Columns are
+    named by header label, 1-based number or spreadsheet letters; a first
+    row that is a header is skipped. Raises ``ValueError`` for unsupported
+    or unreadable files.
+    """
+    ext = Path(filename or "").suffix.lower()
+    if ext == ".txt":
+        return _iter_txt(stream)
+    if ext == ".csv":
+        return _iter_csv(stream, column or "", count_column or "")
+    if ext == ".xlsx":
+        return _iter_xlsx(stream, column or "", count_column or "")
+    raise ValueError(f"不支持的名单文件类型：{filename}（支持 {'、'.join(UPLOAD_EXTENSIONS)}）")
+
+
+def iter_mapped_text(path: Path) -> Iterator[str]:
+    """Yield decoded chunks of a text file read through ``mmap``.
+
+    Pages are mapped rather than read into a buffer, so only the chunk being
+    decoded is resident as a Python object. Line endings are normalised to
+    ``\\n``, also when ``\\r\\n`` straddles a chunk boundary.
+    """
+    with open(path, "rb") as fh:
+        if not fh.seek(0, io.SEEK_END):
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(sniff_encoding(mm[:_SNIFF_BYTES]))(errors="replace"), translate=True
+            )
+            for offset in range(0, len(mm), _TEXT_CHUNK_SIZE):
+                chunk = decoder.decode(mm[offset : offset + _TEXT_CHUNK_SIZE])
+                if chunk:
+                    yield chunk
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+
+
+def iter_roster_file(path: Path, column: str = "", count_column: str = "") -> Iterator[str]:
+    """Yield text chunks for a local roster file, like :func:`iter_upload`.
+
+    ``.csv`` and ``.xlsx`` go through the column readers; anything else is
+    treated as plain text and memory-mapped.
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    if ext not in (".csv", ".xlsx"):
+        yield from iter_mapped_text(path)
+        return
+    with open(path, "rb") as fh:
+        yield from iter_upload(fh, path.name, column, count_column)
@@ -1,29 +1,47 @@
 from __future__ import annotations
 
+import atexit
 import datetime as _dt
+import hashlib
+import importlib.util
 import os
+import shutil
+import signal
+import sys
 import tempfile
-from io import BytesIO
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from flask import (
     Flask,
+    Response,
     abort,
     flash,
+    get_flashed_messages,
+    jsonify,
     redirect,
-    render_template_string,
     request,
     send_file,
+    stream_template,
     url_for,
 )
 
+from grouper.api import api, shutdown_pool
+from grouper.cache import LRUCache, digest_text
+from grouper.export import LAYOUT_LABELS, LAYOUTS, available_exporters, export_bytes, get_exporter
+from grouper.janitor import ExportJanitor
+from grouper.jobs import JobQueue, QueueFull
 from grouper.logic import (
+    check_roster,
     compute_seed_from_timestamp,
     group_students,
+    iter_names,
     parse_names_block,
     parse_teachers_with_counts,
 )
+from grouper.pagination import ResultView, result_json
+from grouper.result_store import ResultStore
+from grouper.upload import UPLOAD_EXTENSIONS, iter_upload
 
 
 DEFAULT_TEACHERS_TEXT = (
@@ -44,150 +62,313 @@ DEFAULT_STUDENTS_TEXT = (
 )
 
 
+JOB_STATUS_LABELS = {"queued": "排队中", "running": "处理中", "done": "已完成", "failed": "失败"}
+
 EXPORT_ROOT = Path(os.environ.get("GROUPER_EXPORT_DIR", tempfile.gettempdir())) / "grouper-exports"
 EXPORT_ROOT.mkdir(parents=True, exist_ok=True)
 
 
-def _build_workbook(groups: Dict[str, List[str]], seed: int) -> BytesIO:
+def _env_int(name: str, default: int) -> int:
     try:
-        from openpyxl import Workbook
-    except Exception as exc:  # pragma: no cover - runtime dependency import guard
-        raise RuntimeError("缺少 openpyxl，请先安装：pip install openpyxl") from exc
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Groups"
-    ws.append(["Teacher", "Students"])
-    for teacher, students in groups.items():
-        ws.append([teacher, ", ".join(students)])
 
-    ws_summary = wb.create_sheet("Summary")
-    total_students = sum(len(v) for v in groups.values())
-    ws_summary.append(["Seed", seed])
-    ws_summary.append(["Teachers", len(groups)])
-    ws_summary.append(["Assigned Students", total_students])
+def _buffered(chunks: Iterable[str], size: int = 16 * 1024) -> Iterator[str]:
+    """Coalesce the many small pieces Jinja yields into fewer, larger chunks."""
+    buffer: List[str] = []
+    pending = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        pending += len(chunk)
+        if pending >= size:
+            yield "".join(buffer)
+            buffer.clear()
+            pending = 0
+    if buffer:
+        yield "".join(buffer)
 
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
 
+def _env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
-PAGE_TEMPLATE = """
-<!doctype html>
-<html lang="zh">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>Grouper 分组器 - Bensz</title>
-  <style>
-    body {
-      font-family: "Microsoft YaHei", "PingFang SC", "Noto Sans CJK SC", sans-serif;
-      margin: 0;
-      background: linear-gradient(135deg, rgba(90, 114, 255, 0.3), rgba(55, 200, 154, 0.3));
-      min-height: 100vh;
-      color: #121212;
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      padding: 24px;
-    }
-    .panel {
-      width: min(1100px, 95vw);
-      background: rgba(255, 255, 255, 0.78);
-      border-radius: 18px;
-      backdrop-filter: blur(16px);
-      box-shadow: 0 20px 45px rgba(15, 20, 40, 0.18);
-      padding: 32px;
-      display: grid;
-      grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
-      gap: 24px;
-    }
-    h1 {
-      grid-column: 1 / -1;
-      margin: 0 0 8px;
-      font-size: 28px;
-      letter-spacing: 0.5px;
-      text-align: center;
-    }
-    form {
-      grid-column: 1 / -1;
-      display: grid;
-      grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
-      gap: 20px;
-    }
-    label {
-      font-weight: 600;
-      margin-bottom: 8px;
-      display: block;
-    }
-    textarea, input[type="number"], input[type="text"] {
-      width: 100%;
-      border-radius: 10px;
-      border: 1px solid rgba(0, 0, 0, 0.1);
-      padding: 12px;
-      font-size: 15px;
-      resize: vertical;
-      background: rgba(255, 255, 255, 0.9);
-    }
-    textarea { min-height: 180px; }
-    .actions {
-      grid-column: 1 / -1;
-      display: flex;
-      gap: 12px;
-      flex-wrap: wrap;
-      align-items: center;
-    }
-    button {
-      border: none;
-      padding: 12px 24px;
-      border-radius: 999px;
-      background: linear-gradient(135deg, #5a72ff, #37c89a);
-      color: white;
-      font-size: 16px;
-      cursor: pointer;
-      box-shadow: 0 10px 20px rgba(90, 114, 255, 0.24);
-      transition: transform 0.15s ease, box-shadow 0.15s ease;
-    }
-    button:hover {
-      transform: translateY(-2px);
-      box-shadow: 0 14px 28px rgba(90, 114, 255, 0.28);
+
+def _export_subdir(value: Optional[str]) -> Optional[Path]:
+    """Resolve a user-supplied save directory, or ``None`` if it leaves EXPORT_ROOT.
+
+    Relative paths are taken against EXPORT_ROOT; an empty value is the root itself.
+    """
+    root = EXPORT_ROOT.resolve()
+    target = (root / value).resolve() if value else root
+    if target == root or root in target.parents:
+        return target
+    return None
+
+
+PAGE_CSS = """
+body {
+  font-family: "Microsoft YaHei", "PingFang SC", "Noto Sans CJK SC", sans-serif;
+  margin: 0;
+  background: linear-gradient(135deg, rgba(90, 114, 255, 0.3), rgba(55, 200, 154, 0.3));
+  min-height: 100vh;
+  color: #121212;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  padding: 24px;
+}
+.panel {
+  width: min(1100px, 95vw);
+  background: rgba(255, 255, 255, 0.78);
+  border-radius: 18px;
+  backdrop-filter: blur(16px);
+  box-shadow: 0 20px 45px rgba(15, 20, 40, 0.18);
+  padding: 32px;
+  display: grid;
+  grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
+  gap: 24px;
+}
+h1 {
+  grid-column: 1 / -1;
+  margin: 0 0 8px;
+  font-size: 28px;
+  letter-spacing: 0.5px;
+  text-align: center;
+}
+form {
+  grid-column: 1 / -1;
+  display: grid;
+  grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
+  gap: 20px;
+}
+label {
+  font-weight: 600;
+  margin-bottom: 8px;
+  display: block;
+}
+textarea, select, input[type="number"], input[type="text"] {
+  width: 100%;
+  border-radius: 10px;
+  border: 1px solid rgba(0, 0, 0, 0.1);
+  padding: 12px;
+  font-size: 15px;
+  resize: vertical;
+  background: rgba(255, 255, 255, 0.9);
+}
+textarea { min-height: 180px; }
+.upload {
+  display: flex;
+  gap: 8px;
+  flex-wrap: wrap;
+  margin-top: 8px;
+  font-size: 13px;
+}
+.upload input[type="text"] { flex: 1 1 120px; width: auto; padding: 8px; font-size: 13px; }
+.actions {
+  grid-column: 1 / -1;
+  display: flex;
+  gap: 12px;
+  flex-wrap: wrap;
+  align-items: center;
+}
+button {
+  border: none;
+  padding: 12px 24px;
+  border-radius: 999px;
+  background: linear-gradient(135deg, #5a72ff, #37c89a);
+  color: white;
+  font-size: 16px;
+  cursor: pointer;
+  box-shadow: 0 10px 20px rgba(90, 114, 255, 0.24);
+  transition: transform 0.15s ease, box-shadow 0.15s ease;
+}
+button:hover {
+  transform: translateY(-2px);
+  box-shadow: 0 14px 28px rgba(90, 114, 255, 0.28);
+}
+.summary, .results {
+  grid-column: 1 / -1;
+  background: rgba(255, 255, 255, 0.82);
+  border-radius: 14px;
+  padding: 20px;
+  border: 1px solid rgba(255, 255, 255, 0.5);
+}
+table {
+  width: 100%;
+  border-collapse: collapse;
+  margin-top: 12px;
+}
+th, td {
+  border: 1px solid rgba(0, 0, 0, 0.08);
+  padding: 10px 12px;
+  text-align: left;
+}
+th { background: rgba(90, 114, 255, 0.1); }
+.flash {
+  grid-column: 1 / -1;
+  padding: 12px 16px;
+  border-radius: 12px;
+  background: rgba(244, 67, 54, 0.12);
+  color: #b71c1c;
+  border: 1px solid rgba(244, 67, 54, 0.22);
+}
+.download-link a {
+  color: #304ffe;
+  font-weight: 600;
+  text-decoration: none;
+}
+.download-link a:hover {
+  text-decoration: underline;
+}
+.vsearch {
+  margin-bottom: 8px;
+}
+.vlist-head, .vlist-row {
+  display: grid;
+  grid-template-columns: minmax(120px, 1fr) 3fr;
+  gap: 12px;
+  padding: 0 12px;
+  align-items: center;
+}
+.vlist-head {
+  height: 34px;
+  font-weight: 600;
+  background: rgba(90, 114, 255, 0.1);
+  border-radius: 8px 8px 0 0;
+}
+.vlist-body {
+  position: relative;
+  height: 480px;
+  overflow-y: auto;
+  border: 1px solid rgba(0, 0, 0, 0.08);
+}
+.vlist-row {
+  position: absolute;
+  left: 0;
+  right: 0;
+  height: 34px;
+  border-bottom: 1px solid rgba(0, 0, 0, 0.06);
+}
+.vlist-row span {
+  overflow: hidden;
+  white-space: nowrap;
+  text-overflow: ellipsis;
+}
+.vlist[data-section="unassigned"] .vlist-row {
+  grid-template-columns: 1fr;
+}
+.vlist-count {
+  color: #555;
+  font-size: 0.9em;
+}
+"""
+
+PAGE_JS = """
+(function () {
+  var ROW_HEIGHT = 34, BLOCK = 200;
+
+  function VirtualList(root) {
+    var body = root.querySelector(".vlist-body");
+    var spacer = root.querySelector(".vlist-spacer");
+    var count = root.querySelector(".vlist-count");
+    var search = root.dataset.search ? document.getElementById(root.dataset.search) : null;
+    var section = root.dataset.section;
+    var query = "", total = 0, blocks = {}, generation = 0, pending = false, timer = null;
+
+    function setTotal(n) {
+      total = n;
+      spacer.style.height = n * ROW_HEIGHT + "px";
+      count.textContent = "共 " + n + " 行";
     }
-    .summary, .results {
-      grid-column: 1 / -1;
-      background: rgba(255, 255, 255, 0.82);
-      border-radius: 14px;
-      padding: 20px;
-      border: 1px solid rgba(255, 255, 255, 0.5);
+
+    function load(block) {
+      if (blocks[block]) return;
+      blocks[block] = "loading";
+      var gen = generation;
+      var params = new URLSearchParams({ section: section, offset: block * BLOCK, limit: BLOCK, q: query });
+      fetch(root.dataset.rowsUrl + "?" + params)
+        .then(function (resp) { return resp.json(); })
+        .then(function (data) {
+          if (gen !== generation) return;
+          blocks[block] = data.rows;
+          setTotal(data.total);
+          schedule();
+        })
+        .catch(function () { if (gen === generation) delete blocks[block]; });
     }
-    table {
-      width: 100%;
-      border-collapse: collapse;
-      margin-top: 12px;
+
+    function cell(text) {
+      var span = document.createElement("span");
+      span.textContent = text;
+      span.title = text;
+      return span;
     }
-    th, td {
-      border: 1px solid rgba(0, 0, 0, 0.08);
-      padding: 10px 12px;
-      text-align: left;
+
+    function render() {
+      pending = false;
+      var first = Math.floor(body.scrollTop / ROW_HEIGHT);
+      var last = Math.min(total, first + Math.ceil(body.clientHeight / ROW_HEIGHT) + 1);
+      var fragment = document.createDocumentFragment();
+      for (var i = first; i < last; i++) {
+        var rows = blocks[Math.floor(i / BLOCK)];
+        if (!Array.isArray(rows)) { load(Math.floor(i / BLOCK)); continue; }
+        var data = rows[i % BLOCK];
+        if (!data) continue;
+        var row = document.createElement("div");
+        row.className = "vlist-row";
+        row.style.top = i * ROW_HEIGHT + "px";
+        row.appendChild(cell(data[0]));
+        if (data.length > 1) row.appendChild(cell(data[1].join(", ")));
+        fragment.appendChild(row);
+      }
+      body.replaceChildren(spacer, fragment);
     }
-    th { background: rgba(90, 114, 255, 0.1); }
-    .flash {
-      grid-column: 1 / -1;
-      padding: 12px 16px;
-      border-radius: 12px;
-      background: rgba(244, 67, 54, 0.12);
-      color: #b71c1c;
-      border: 1px solid rgba(244, 67, 54, 0.22);
+
+    function schedule() {
+      if (!pending) { pending = true; window.requestAnimationFrame(render); }
     }
-    .download-link a {
-      color: #304ffe;
-      font-weight: 600;
-      text-decoration: none;
+
+    function reset() {
+      generation += 1;
+      blocks = {};
+      body.scrollTop = 0;
+      load(0);
     }
-    .download-link a:hover {
-      text-decoration: underline;
+
+    body.addEventListener("scroll", schedule);
+    if (search) {
+      search.addEventListener("input", function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () { query = search.value.trim(); reset(); }, 250);
+      });
     }
-  </style>
+    load(0);
+  }
+
+  document.querySelectorAll(".vlist").forEach(VirtualList);
+})();
+"""
+
+# Static assets: served under a content fingerprint so they can be cached forever.
+ASSETS = {
+    "css": (PAGE_CSS.lstrip().encode("utf-8"), "text/css"),
+    "js": (PAGE_JS.lstrip().encode("utf-8"), "text/javascript"),
+}
+ASSET_DIGESTS = {ext: hashlib.sha256(data).hexdigest()[:12] for ext, (data, _mimetype) in ASSETS.items()}
+
+PAGE_TEMPLATE = """
+<!doctype html>
+<html lang="zh">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>Grouper 分组器 - Bensz</title>
+  {% if job and job.pending %}<meta http-equiv="refresh" content="2" />{% endif %}
+  <link rel="stylesheet" href="{{ url_for('page_asset', digest=asset_digests.css, ext='css') }}" />
 </head>
 <body>
   <div class="panel">
@@ -200,41 +381,112 @@ PAGE_TEMPLATE = """
       {% endif %}
     {% endwith %}
 
-    <form method="post">
+    <form method="post" enctype="multipart/form-data">
       <div>
         <label for="teachers">老师配置</label>
-        <textarea id="teachers" name="teachers">{{ teachers_text }}</textarea>
+        <textarea id="teachers" name="teachers"{% if teachers_note %} placeholder="{{ teachers_note }}"{% endif %}>{{ teachers_text }}</textarea>
+        <div class="upload">
+          <input type="file" name="teachers_file" accept="{{ upload_accept }}" />
+          <input type="text" name="teachers_column" value="{{ teachers_column }}" placeholder="姓名列（列名/序号/字母）" />
+          <input type="text" name="teachers_count_column" value="{{ teachers_count_column }}" placeholder="人数列（可选）" />
+        </div>
       </div>
       <div>
         <label for="students">学生名单</label>
-        <textarea id="students" name="students">{{ students_text }}</textarea>
+        <textarea id="students" name="students"{% if students_note %} placeholder="{{ students_note }}"{% endif %}>{{ students_text }}</textarea>
+        <div class="upload">
+          <input type="file" name="students_file" accept="{{ upload_accept }}" />
+          <input type="text" name="students_column" value="{{ students_column }}" placeholder="姓名列（列名/序号/字母）" />
+        </div>
       </div>
       <div>
         <label for="per_teacher">默认每位老师的学生数</label>
         <input id="per_teacher" name="per_teacher" type="number" min="0" value="{{ per_teacher }}" />
       </div>
+      {% if persist_exports %}
       <div>
         <label for="export_dir">文件保存目录（容器内路径）</label>
         <input id="export_dir" name="export_dir" type="text" value="{{ export_dir }}" />
       </div>
+      {% endif %}
+      <div>
+        <label for="export_format">导出格式</label>
+        <select id="export_format" name="export_format">
+          {% for exporter in exporters %}
+            <option value="{{ exporter.key }}" {% if exporter.key == export_format %}selected{% endif %}>{{ exporter.label }}</option>
+          {% endfor %}
+        </select>
+      </div>
+      <div>
+        <label for="export_layout">导出布局</label>
+        <select id="export_layout" name="export_layout">
+          {% for key, label in layouts %}
+            <option value="{{ key }}" {% if key == export_layout %}selected{% endif %}>{{ label }}</option>
+          {% endfor %}
+        </select>
+      </div>
       <div class="actions">
         <button type="submit">立即分组！</button>
       </div>
     </form>
 
+    {% if job %}
+      <div class="summary">
+        <h2>后台任务 <code>{{ job.id }}</code></h2>
+        <p>状态：<strong>{{ job_status_labels.get(job.status, job.status) }}</strong>{% if job.pending %}（页面每 2 秒自动刷新）{% endif %}</p>
+        {% if job.error %}
+          <p>错误：{{ job.error }}</p>
+        {% endif %}
+        {% if job.summary %}
+          <p>随机种子：<strong>{{ job.summary.seed }}</strong></p>
+          <p>教师数：{{ job.summary.teacher_count }} ｜ 学生数：{{ job.summary.student_count }} ｜ 已分配：{{ job.summary.assigned_students }} ｜ 未分配：{{ job.summary.unassigned_count }}</p>
+        {% endif %}
+        {% if job.timings %}
+          <p>耗时：{% for stage, seconds in job.timings.items() %}{{ stage }} {{ '%.2f'|format(seconds) }}s{% if not loop.last %} ｜ {% endif %}{% endfor %}</p>
+        {% endif %}
+        {% if job.status == 'done' and job.filename %}
+          <p class="download-link"><a href="{{ url_for('api.job_download', job_id=job.id) }}" target="_blank">下载结果文件（{{ job.filename }}）</a></p>
+        {% endif %}
+      </div>
+    {% endif %}
+
     {% if summary %}
       <div class="summary">
         <h2>汇总信息</h2>
         <p>随机种子：<strong>{{ summary.seed }}</strong></p>
         <p>教师数：{{ summary.teacher_count }} ｜ 学生数：{{ summary.student_count }} ｜ 已分配：{{ summary.assigned_students }}</p>
         <p>生成文件：<code>{{ summary.filename }}</code></p>
-        <p class="download-link"><a href="{{ url_for('download_file', filename=summary.filename, export_dir=summary.export_dir) }}" target="_blank">下载 Excel 文件</a></p>
+        {% if summary.token %}
+          <p class="download-link"><a href="{{ url_for('download_result', token=summary.token) }}" target="_blank">下载结果文件（{{ summary.format_label }}）</a></p>
+        {% elif summary.export_dir %}
+          <p class="download-link"><a href="{{ url_for('download_file', filename=summary.filename, export_dir=summary.export_dir) }}" target="_blank">下载结果文件（{{ summary.format_label }}）</a></p>
+        {% endif %}
         {% if summary.unassigned %}
           <p>未分配学生：{{ summary.unassigned|join(', ') }}</p>
         {% endif %}
       </div>
     {% endif %}
 
+    {% if view %}
+      <div class="results">
+        <h2>分组结果</h2>
+        <input id="result-search" class="vsearch" type="search" placeholder="搜索老师或学生…" />
+        <div class="vlist" data-rows-url="{{ view.rows_url }}" data-section="groups" data-search="result-search">
+          <div class="vlist-head"><span>老师</span><span>学生</span></div>
+          <div class="vlist-body"><div class="vlist-spacer"></div></div>
+          <p class="vlist-count"></p>
+        </div>
+        {% if view.unassigned_count %}
+          <h2>未分配学生（{{ view.unassigned_count }}）</h2>
+          <div class="vlist" data-rows-url="{{ view.rows_url }}" data-section="unassigned">
+            <div class="vlist-body"><div class="vlist-spacer"></div></div>
+            <p class="vlist-count"></p>
+          </div>
+        {% endif %}
+      </div>
+      <script src="{{ url_for('page_asset', digest=asset_digests.js, ext='js') }}" defer></script>
+    {% endif %}
+
     {% if results %}
       <div class="results">
         <h2>分组结果</h2>
@@ -262,6 +514,147 @@ PAGE_TEMPLATE = """
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config["SECRET_KEY"] = os.environ.get("GROUPER_SECRET_KEY", "replace-me")
+    # Roster files are spooled to disk by the multipart parser; pasted text
+    # fields are held in memory, so they get their own (smaller) cap.
+    app.config["MAX_CONTENT_LENGTH"] = _env_int("GROUPER_MAX_UPLOAD_BYTES", 64 * 1024 * 1024) or None
+    app.config["MAX_FORM_MEMORY_SIZE"] = _env_int("GROUPER_MAX_FORM_BYTES", 16 * 1024 * 1024) or None
+
+    # Parsed rosters keyed by input digest, and rendered results keyed by
+    # (inputs, per_teacher, seed, format, layout); both bounded so memory stays capped.
+    cache_ttl = _env_int("GROUPER_CACHE_TTL", 600)
+    parse_cache = LRUCache(_env_int("GROUPER_CACHE_SIZE", 128), ttl=cache_ttl)
+    result_cache = LRUCache(
+        _env_int("GROUPER_RESULT_CACHE_SIZE", 32),
+        ttl=cache_ttl,
+        max_bytes=_env_int("GROUPER_RESULT_CACHE_BYTES", 64 * 1024 * 1024),
+        sizeof=lambda value: len(value[1]),
+    )
+    app.extensions["grouper_caches"] = {"parse": parse_cache, "result": result_cache}
+
+    # Rendered files are handed out by token from memory (or a private temp
+    # dir for large ones); writing them to the export dir is opt-in.
+    persist_exports = _env_flag("GROUPER_PERSIST_EXPORTS")
+    result_store = ResultStore(
+        max_bytes=_env_int("GROUPER_RESULT_STORE_BYTES", 64 * 1024 * 1024),
+        ttl=_env_int("GROUPER_RESULT_TTL", 1800),
+        spill_threshold=_env_int("GROUPER_RESULT_SPILL_THRESHOLD", 8 * 1024 * 1024),
+        max_spill_bytes=_env_int("GROUPER_RESULT_SPILL_BYTES", 512 * 1024 * 1024),
+        spill_dir=os.environ.get("GROUPER_RESULT_SHARED_DIR") or os.environ.get("GROUPER_RESULT_SPILL_DIR") or None,
+        shared=bool(os.environ.get("GROUPER_RESULT_SHARED_DIR")),
+    )
+    atexit.register(result_store.clear)
+    app.extensions["grouper_results"] = result_store
+
+    # Persisted files are indexed and pruned by age / size / count off-thread.
+    janitor = None
+    if persist_exports:
+        janitor = ExportJanitor(
+            EXPORT_ROOT,
+            max_age=_env_int("GROUPER_EXPORT_MAX_AGE", 7 * 24 * 3600),
+            max_bytes=_env_int("GROUPER_EXPORT_MAX_BYTES", 1024 * 1024 * 1024),
+            max_files=_env_int("GROUPER_EXPORT_MAX_FILES", 10000),
+            interval=_env_int("GROUPER_EXPORT_SWEEP_INTERVAL", 300),
+        )
+        janitor.start()
+        atexit.register(janitor.stop, 5)
+    app.extensions["grouper_janitor"] = janitor
+
+    app.config["GROUPER_API_MAX_BYTES"] = _env_int("GROUPER_API_MAX_BYTES", 32 * 1024 * 1024)
+    app.config["GROUPER_API_MAX_BATCH"] = _env_int("GROUPER_API_MAX_BATCH", 100)
+    app.config["GROUPER_API_BATCH_WORKERS"] = _env_int("GROUPER_API_BATCH_WORKERS", min(4, os.cpu_count() or 1))
+    app.register_blueprint(api)
+    atexit.register(shutdown_pool)
+
+    # Large form submissions, and POST /api/v1/jobs, run as background jobs.
+    job_threshold = _env_int("GROUPER_JOB_THRESHOLD_BYTES", 1024 * 1024)
+    job_queue = JobQueue(
+        Path(os.environ.get("GROUPER_JOB_DIR") or EXPORT_ROOT.parent / "grouper-jobs"),
+        workers=_env_int("GROUPER_JOB_WORKERS", 1),
+        max_pending=_env_int("GROUPER_JOB_MAX_PENDING", 16),
+        ttl=_env_int("GROUPER_JOB_TTL", 24 * 3600),
+    )
+    job_queue.start()
+    atexit.register(job_queue.stop)
+    app.extensions["grouper_jobs"] = job_queue
+
+    # Results with more rows than this are paged in by the browser instead of
+    # being rendered into the page; parsed results are kept for paging.
+    inline_rows = _env_int("GROUPER_INLINE_ROWS", 200)
+    view_cache = LRUCache(_env_int("GROUPER_VIEW_CACHE_SIZE", 8), ttl=cache_ttl)
+
+    def _parse_inputs(teachers_text: str, students_text: str):
+        teachers, counts = parse_teachers_with_counts(teachers_text)
+        return teachers, counts, parse_names_block(students_text)
+
+    # Textareas longer than this are not echoed back into the result page.
+    echo_limit = _env_int("GROUPER_ECHO_LIMIT_BYTES", 64 * 1024)
+
+    def _upload_size(upload) -> int:
+        stream = upload.stream
+        try:
+            size = stream.seek(0, os.SEEK_END)
+            stream.seek(0)
+            return size
+        except (AttributeError, OSError):
+            return upload.content_length or 0
+
+    def _parse_uploads(teachers_text: str, students_text: str, teachers_upload, students_upload):
+        """Parse each roster from its uploaded file if one was sent, else from its textarea."""
+        if teachers_upload is not None:
+            teachers, counts = parse_teachers_with_counts(
+                iter_upload(
+                    teachers_upload.stream,
+                    teachers_upload.filename,
+                    request.form.get("teachers_column", ""),
+                    request.form.get("teachers_count_column", ""),
+                )
+            )
+        else:
+            teachers, counts = parse_teachers_with_counts(teachers_text)
+        if students_upload is not None:
+            students = list(
+                iter_names(
+                    iter_upload(
+                        students_upload.stream, students_upload.filename, request.form.get("students_column", "")
+                    )
+                )
+            )
+        else:
+            students = parse_names_block(students_text)
+        return teachers, counts, students
+
+    # Compiled once; render_template_string would re-parse the source per request.
+    page_template = app.jinja_env.from_string(PAGE_TEMPLATE)
+    page_defaults = {
+        "job": None,
+        "job_status_labels": JOB_STATUS_LABELS,
+        "asset_digests": ASSET_DIGESTS,
+        "view": None,
+        "teachers_text": DEFAULT_TEACHERS_TEXT,
+        "students_text": DEFAULT_STUDENTS_TEXT,
+        "teachers_note": "",
+        "students_note": "",
+        "teachers_column": "",
+        "teachers_count_column": "",
+        "students_column": "",
+        "upload_accept": ",".join(UPLOAD_EXTENSIONS),
+        "per_teacher": 1,
+        "export_dir": str(EXPORT_ROOT),
+        "persist_exports": persist_exports,
+        "export_format": "xlsx",
+        "export_layout": "wide",
+        "layouts": [(key, LAYOUT_LABELS[key]) for key in LAYOUTS],
+        "results": None,
+        "summary": None,
+    }
+
+    def _page(**context) -> Response:
+        """Stream the page, so big result tables are sent as they render."""
+        # Pop flashes now: the session cookie is written before a streamed
+        # body renders, so popping them mid-stream would leave them behind.
+        get_flashed_messages()
+        page = stream_template(page_template, **{**page_defaults, "exporters": available_exporters(), **context})
+        return Response(_buffered(page), mimetype="text/html")
 
     @app.route("/", methods=["GET", "POST"])
     def index():
@@ -269,24 +662,52 @@ def create_app() -> Flask:
         students_text = DEFAULT_STUDENTS_TEXT
         per_teacher = 1
         export_dir = str(EXPORT_ROOT)
+        export_format = "xlsx"
+        export_layout = "wide"
+        teachers_note = students_note = ""
         results: Dict[str, List[str]] | None = None
         summary_payload = None
+        view = None
 
         def _render():
-            return render_template_string(
-                PAGE_TEMPLATE,
-                teachers_text=teachers_text,
-                students_text=students_text,
+            return _page(
+                # Uploaded or very long rosters are not sent back into the page.
+                teachers_text="" if teachers_note else teachers_text,
+                students_text="" if students_note else students_text,
+                teachers_note=teachers_note,
+                students_note=students_note,
+                teachers_column=request.form.get("teachers_column", ""),
+                teachers_count_column=request.form.get("teachers_count_column", ""),
+                students_column=request.form.get("students_column", ""),
                 per_teacher=per_teacher,
                 export_dir=export_dir,
+                export_format=export_format,
+                export_layout=export_layout,
                 results=results,
                 summary=summary_payload,
+                view=view,
             )
 
         if request.method == "POST":
             teachers_text = request.form.get("teachers", DEFAULT_TEACHERS_TEXT)
             students_text = request.form.get("students", DEFAULT_STUDENTS_TEXT)
-            export_dir = request.form.get("export_dir", str(EXPORT_ROOT)).strip() or str(EXPORT_ROOT)
+            teachers_upload = request.files.get("teachers_file")
+            students_upload = request.files.get("students_file")
+            teachers_upload = teachers_upload if teachers_upload and teachers_upload.filename else None
+            students_upload = students_upload if students_upload and students_upload.filename else None
+            if teachers_upload is not None:
+                teachers_note = f"已读取上传文件：{teachers_upload.filename}"
+            elif len(teachers_text) > echo_limit:
+                teachers_note = f"内容较长（{len(teachers_text)} 个字符），未在页面中回显。"
+            if students_upload is not None:
+                students_note = f"已读取上传文件：{students_upload.filename}"
+            elif len(students_text) > echo_limit:
+                students_note = f"内容较长（{len(students_text)} 个字符），未在页面中回显。"
+            if persist_exports:
+                export_dir = request.form.get("export_dir", str(EXPORT_ROOT)).strip() or str(EXPORT_ROOT)
+                if _export_subdir(export_dir) is None:
+                    flash(f"保存目录必须位于 {EXPORT_ROOT} 之内。")
+                    return _render()
             try:
                 per_teacher = int(request.form.get("per_teacher", "1"))
                 if per_teacher < 0:
@@ -295,43 +716,115 @@ def create_app() -> Flask:
                 flash("每位老师的学生数必须是非负整数。")
                 return _render()
 
-            teachers, counts = parse_teachers_with_counts(teachers_text)
-            students = parse_names_block(students_text)
-
-            if not teachers:
-                flash("请至少输入一位老师。")
+            export_format = request.form.get("export_format", "xlsx")
+            export_layout = request.form.get("export_layout", "wide")
+            try:
+                exporter = get_exporter(export_format)
+            except (ValueError, RuntimeError) as exc:
+                flash(str(exc))
                 return _render()
-            if not students:
-                flash("请至少输入一位学生。")
+            if export_layout not in LAYOUTS:
+                flash("未知的导出布局。")
                 return _render()
 
-            desired_total = sum(counts.get(t, per_teacher) for t in teachers)
-            if desired_total > len(students):
-                flash("老师期望的学生数超过学生总数，请检查输入。")
+            if students_upload is not None or teachers_upload is not None:
+                # Files are parsed as they are read; the rosters never exist
+                # as one string, so they bypass the digest-keyed caches.
+                input_key = None
+                students_size = _upload_size(students_upload) if students_upload is not None else len(students_text)
+                try:
+                    teachers, counts, students = _parse_uploads(
+                        teachers_text, students_text, teachers_upload, students_upload
+                    )
+                except (ValueError, RuntimeError) as exc:
+                    flash(str(exc))
+                    return _render()
+                if job_threshold > 0 and students_size >= job_threshold:
+                    # Jobs are stored as text; the parsed rosters round-trip unchanged.
+                    teachers_text = "\n".join(f"{t}:{counts[t]}" if t in counts else t for t in teachers)
+                    students_text = "\n".join(students)
+            else:
+                input_key = digest_text(teachers_text, students_text)
+                students_size = len(students_text)
+
+            if job_threshold > 0 and students_size >= job_threshold:
+                spec = {
+                    "teachers": teachers_text,
+                    "students": students_text,
+                    "per_teacher": per_teacher,
+                    "seed": compute_seed_from_timestamp(),
+                    "format": exporter.key,
+                    "layout": export_layout,
+                }
+                try:
+                    job_id = job_queue.submit(spec)
+                except QueueFull:
+                    flash("服务器繁忙，任务队列已满，请稍后再试。")
+                    return _render(), 429
+                return redirect(url_for("job_page", job_id=job_id))
+
+            if input_key is not None:
+                teachers, counts, students = parse_cache.get_or_compute(
+                    input_key, lambda: _parse_inputs(teachers_text, students_text)
+                )
+
+            try:
+                check_roster(teachers, students, per_teacher, counts)
+            except ValueError as exc:
+                flash(str(exc))
                 return _render()
 
             seed = compute_seed_from_timestamp()
-            groups = group_students(students, teachers, per_teacher, seed, counts)
 
-            results = groups
+            def _group_and_render():
+                grouped = group_students(students, teachers, per_teacher, seed, counts)
+                return grouped, export_bytes(grouped, seed, exporter.key, export_layout)
+
+            if input_key is None:
+                groups, export_data = _group_and_render()
+            else:
+                groups, export_data = result_cache.get_or_compute(
+                    (input_key, per_teacher, seed, exporter.key, export_layout), _group_and_render
+                )
+
             assigned = sum(len(v) for v in groups.values())
             assigned_set = {item for sub in groups.values() for item in sub}
             unassigned = [s for s in students if s not in assigned_set]
+            view = None
+            if len(groups) <= inline_rows and len(unassigned) <= inline_rows:
+                results = groups
+            else:
+                # Too big to lay out at once: the page pulls rows as it scrolls.
+                view_token = result_store.put(result_json(groups, unassigned), "result.json", "application/json")
+                if view_token is None:
+                    flash("结果过大，无法在页面中显示，请下载结果文件查看。")
+                else:
+                    view = {
+                        "rows_url": url_for("result_rows", token=view_token),
+                        "unassigned_count": len(unassigned),
+                    }
 
             timestamp = _dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"Grouper_{timestamp}_{seed}.xlsx"
+            filename = f"Grouper_{timestamp}_{seed}{exporter.extension}"
 
-            target_dir = Path(export_dir)
-            try:
-                target_dir.mkdir(parents=True, exist_ok=True)
-            except OSError:
-                flash("无法创建保存目录，请检查权限或路径。")
-                return _render()
+            saved_dir = None
+            if persist_exports:
+                target_dir = _export_subdir(export_dir)
+                try:
+                    target_dir.mkdir(parents=True, exist_ok=True)
+                except OSError:
+                    flash("无法创建保存目录，请检查权限或路径。")
+                    return _render()
 
-            workbook = _build_workbook(groups, seed)
-            target_path = target_dir / filename
-            with target_path.open("wb") as fh:
-                fh.write(workbook.getvalue())
+                target_path = target_dir / filename
+                with target_path.open("wb") as fh:
+                    fh.write(export_data)
+                janitor.record(target_path, len(export_data))
+                saved_dir = str(target_dir)
+
+            token = result_store.put(export_data, filename, exporter.mimetype)
+            if token is None and saved_dir is None:
+                flash("结果文件过大，无法暂存下载，请缩小名单或联系管理员启用文件保存。")
 
             summary_payload = {
                 "seed": seed,
@@ -339,30 +832,222 @@ def create_app() -> Flask:
                 "student_count": len(students),
                 "assigned_students": assigned,
                 "filename": filename,
-                "unassigned": unassigned,
-                "export_dir": str(target_dir),
+                "format_label": exporter.label,
+                "unassigned": unassigned if results is not None else [],
+                "token": token,
+                "export_dir": saved_dir,
             }
 
         return _render()
 
+    @app.route("/jobs/<job_id>")
+    def job_page(job_id: str):
+        job = job_queue.get(job_id)
+        if job is None:
+            abort(404)
+        view = None
+        if job.status == "done":
+            view = {
+                "rows_url": url_for("job_rows", job_id=job.id),
+                "unassigned_count": job.summary.get("unassigned_count", 0),
+            }
+        return _page(job=job, view=view)
+
+    def _rows(key, load) -> Response:
+        """Answer a page request for the stored result ``load()`` returns."""
+        view = view_cache.get(key)
+        if view is None:
+            data = load()
+            if data is None:
+                abort(404)
+            view = ResultView.from_json(data)
+            view_cache.put(key, view)
+        try:
+            offset = int(request.args.get("offset", 0))
+            limit = min(500, int(request.args.get("limit", 100)))
+            payload = view.page(request.args.get("section", "groups"), offset, limit, request.args.get("q", ""))
+        except ValueError:
+            abort(400)
+        return jsonify(payload)
+
+    @app.route("/results/<token>/rows")
+    def result_rows(token: str):
+        def load():
+            stored = result_store.get(token)
+            if stored is None:
+                return None
+            with stored.open() as fh:
+                return fh.read()
+
+        return _rows(("result", token), load)
+
+    @app.route("/jobs/<job_id>/rows")
+    def job_rows(job_id: str):
+        def load():
+            job = job_queue.get(job_id)
+            if job is None or job.status != "done":
+                return None
+            try:
+                return job_queue.result_path(job).read_bytes()
+            except OSError:
+                return None
+
+        return _rows(("job", job_id), load)
+
+    @app.route("/assets/grouper.<digest>.<ext>")
+    def page_asset(digest: str, ext: str):
+        if ext not in ASSETS:
+            abort(404)
+        if digest != ASSET_DIGESTS[ext]:
+            # An old fingerprint: point at the current file instead of caching it.
+            return redirect(url_for("page_asset", digest=ASSET_DIGESTS[ext], ext=ext))
+        data, mimetype = ASSETS[ext]
+        response = Response(data, mimetype=mimetype)
+        response.set_etag(ASSET_DIGESTS[ext])
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+        return response.make_conditional(request)
+
+    @app.route("/healthz")
+    def healthz():
+        return jsonify({"status": "ok", "pid": os.getpid()})
+
+    @app.route("/stats/cache")
+    def cache_stats():
+        payload = {name: cache.stats() for name, cache in app.extensions["grouper_caches"].items()}
+        payload["files"] = result_store.stats()
+        payload["jobs"] = job_queue.stats()
+        if janitor is not None:
+            payload["exports"] = janitor.stats()
+        return jsonify(payload)
+
+    @app.route("/result/<token>")
+    def download_result(token: str):
+        stored = result_store.get(token)
+        if stored is None:
+            abort(404)
+        try:
+            stream = stored.open()
+        except FileNotFoundError:
+            abort(404)
+        return send_file(
+            stream,
+            mimetype=stored.mimetype,
+            as_attachment=True,
+            download_name=stored.filename,
+            max_age=0,
+        )
+
     @app.route("/download/<path:filename>")
     def download_file(filename: str):
+        if not persist_exports:
+            # Nothing is written to disk then; results are served from /result/<token>.
+            abort(404)
         safe_name = Path(filename).name
-        export_dir_arg = request.args.get("export_dir")
-        base_dir = Path(export_dir_arg) if export_dir_arg else EXPORT_ROOT
-        target = Path(base_dir) / safe_name
-        if not target.exists():
+        base_dir = _export_subdir(request.args.get("export_dir"))
+        if base_dir is None:
+            abort(404)
+        target = base_dir / safe_name
+        try:
+            # Opening under the janitor's lease keeps a sweep from racing us.
+            stream = janitor.open(target) if janitor is not None else target.open("rb")
+        except (FileNotFoundError, IsADirectoryError):
             abort(404)
-        return send_file(target, as_attachment=True, download_name=safe_name)
+        return send_file(stream, as_attachment=True, download_name=safe_name)
 
     return app
 
 
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def _raise_interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _serve_gunicorn(host: str, port: int, workers: int, threads: int, graceful_timeout: int) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("缺少 gunicorn，请先安装：pip install gunicorn") from exc
+
+    class _GrouperApplication(BaseApplication):
+        def load_config(self) -> None:
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("worker_class", "gthread" if threads > 1 else "sync")
+            self.cfg.set("graceful_timeout", graceful_timeout)
+
+        def load(self):
+            # Called in each worker after fork, so background threads and
+            # caches belong to the worker rather than the master.
+            return create_app()
+
+    _GrouperApplication().run()
+
+
+def _serve_waitress(host: str, port: int, threads: int) -> None:
+    try:
+        from waitress import create_server
+    except Exception as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("缺少 waitress，请先安装：pip install waitress") from exc
+
+    server = create_server(create_app(), host=host, port=port, threads=threads)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
 def main() -> None:
-    app = create_app()
+    """Serve the web app.
+
+    ``GROUPER_WEB_SERVER`` picks the server: ``gunicorn`` (multi-process,
+    POSIX only), ``waitress`` (single process, threaded), ``dev`` (Flask's
+    development server) or ``auto`` (the first of gunicorn/waitress that is
+    installed). ``GROUPER_WEB_WORKERS`` and ``GROUPER_WEB_THREADS`` set the
+    process and per-process thread counts; ``GROUPER_WEB_GRACEFUL_TIMEOUT`` is
+    how long gunicorn lets in-flight requests finish on SIGTERM.
+    """
     host = os.environ.get("GROUPER_WEB_HOST", "0.0.0.0")
     port = int(os.environ.get("GROUPER_WEB_PORT", "8000"))
-    app.run(host=host, port=port)
+    server = os.environ.get("GROUPER_WEB_SERVER", "auto").strip().lower()
+    workers = max(1, _env_int("GROUPER_WEB_WORKERS", 1))
+    threads = max(1, _env_int("GROUPER_WEB_THREADS", 8))
+    graceful_timeout = _env_int("GROUPER_WEB_GRACEFUL_TIMEOUT", 30)
+
+    if server == "auto":
+        if not sys.platform.startswith("win") and _has_module("gunicorn"):
+            server = "gunicorn"
+        elif _has_module("waitress"):
+            server = "waitress"
+        else:
+            server = "dev"
+
+    if server == "gunicorn":
+        if workers > 1 and not os.environ.get("GROUPER_RESULT_SHARED_DIR"):
+            # Download tokens must resolve in whichever worker gets the request.
+            shared_dir = tempfile.mkdtemp(prefix="grouper-shared-")
+            os.environ["GROUPER_RESULT_SHARED_DIR"] = shared_dir
+            master_pid = os.getpid()
+            # Workers are forked from here and inherit atexit hooks, so only
+            # the master may remove the directory.
+            atexit.register(lambda: os.getpid() == master_pid and shutil.rmtree(shared_dir, True))
+        _serve_gunicorn(host, port, workers, threads, graceful_timeout)
+    elif server == "waitress":
+        if workers > 1:
+            print("waitress 仅支持单进程，已忽略 GROUPER_WEB_WORKERS。", file=sys.stderr)
+        _serve_waitress(host, port, threads)
+    elif server == "dev":
+        create_app().run(host=host, port=port, threaded=True)
+    else:
+        raise SystemExit(f"未知的 GROUPER_WEB_SERVER：{server}")
 
 
 if __name__ == "__main__":